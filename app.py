@@ -3,18 +3,25 @@ Main Application
 Kết nối Model-View-Controller và khởi động ứng dụng
 """
 
+import time
+
+# Mốc 0 để đo thời gian khởi động, đặt trước các import nặng
+_START = time.perf_counter()
+
 import customtkinter as ctk
 from tkinter import messagebox
 import sys
 import os
+import threading
+from typing import Callable, List
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from models import Note, NoteRepository
-from controllers import NoteController
+from controllers import NoteController, UiDispatcher, SearchPipeline, AttachmentIngest
 from views import MainView
-from constants import FilterType, Messages, FileConstraints, Priority
+from constants import FilterType, Messages, FileConstraints, Priority, SearchBackend, UIConstants, WriteMode, DatabaseConfig
 
 
 class NoteApp:
@@ -22,6 +29,10 @@ class NoteApp:
     
     def __init__(self):
         """Khởi tạo ứng dụng"""
+        # Mốc thời gian khởi động (giây kể từ _START)
+        self.startup_metrics = {}
+        self._mark("imports")
+        
         # Set appearance
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
@@ -29,61 +40,152 @@ class NoteApp:
         # Create main window
         self.root = ctk.CTk()
         
-        # Kết nối MySQL
+        # Kết nối MySQL (schema + dữ liệu được tải nền sau khi cửa sổ hiện)
         self.repository = NoteRepository(
-            host="localhost",
-            user="root",
-            password="",
-            database="todo_app_mvc"
+            host=DatabaseConfig.HOST,
+            user=DatabaseConfig.USER,
+            password=DatabaseConfig.PASSWORD,
+            database=DatabaseConfig.DATABASE,
+            write_mode=WriteMode.DEFAULT,
+            auto_load=False
         )
         
         # Initialize Controller
-        self.controller = NoteController(self.repository)
+        self.controller = NoteController(self.repository, search_backend=SearchBackend.DEFAULT)
         
         # Initialize View
         self.view = MainView(self.root)
         
+        # Ghi chú còn đang tải nền: index mới sẽ thay index cũ khi tải xong nên
+        # các thao tác sửa dữ liệu bị khóa tới lúc đó (xem _when_loaded)
+        self._data_loaded = False
+        self._pending_sort = None
+        
+        # Background work -> main thread
+        self.dispatcher = UiDispatcher(self.root)
+        self.dispatcher.start()
+        self.search_pipeline = SearchPipeline(
+            self.root,
+            self.dispatcher,
+            search_fn=self.controller.run_search,
+            on_results=self.view.display_notes,
+            debounce_ms=UIConstants.SEARCH_DEBOUNCE_MS,
+            apply_fn=self.controller.apply_search
+        )
+        self.attachment_ingest = AttachmentIngest(self.controller, self.dispatcher)
+        
+        # Ghi hết thay đổi đang chờ (write-behind) trước khi đóng cửa sổ
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        
         # Connect callbacks
         self._setup_callbacks()
         
-        # Load initial data
+        # Hiện cửa sổ ngay, dữ liệu tải ở thread nền rồi đổ vào danh sách
+        self.view.show_loading()
+        self._mark("window_built")
+        # after_idle chạy sau các lượt vẽ đã xếp hàng khi dựng widget -> khung hình đầu tiên
+        self.root.after_idle(lambda: self._mark("first_paint"))
+        threading.Thread(target=self._initialize_data, name="startup-load", daemon=True).start()
+    
+    def _mark(self, name: str):
+        self.startup_metrics[name] = time.perf_counter() - _START
+    
+    def _initialize_data(self):
+        """Chạy trên thread nền: kiểm tra schema và tải ghi chú"""
+        error = None
+        try:
+            self.controller.initialize(
+                on_batch=lambda notes: self.dispatcher.post(self._on_notes_batch, notes)
+            )
+        except Exception as e:
+            error = e
+        self.dispatcher.post(self._on_data_loaded, error)
+    
+    def _on_notes_batch(self, notes: List[Note]):
+        """Một lô ghi chú vừa đọc xong: đổ dần vào danh sách (chỉ khi đang xem Tất cả)"""
+        if self.view.current_filter != FilterType.ALL:
+            return
+        if "first_batch" not in self.startup_metrics:
+            self._mark("first_batch")
+            self.view.display_notes(notes)
+        else:
+            self.view.append_notes(notes)
+    
+    def _on_data_loaded(self, error):
+        if error is not None:
+            messagebox.showerror("Lỗi", f"{Messages.ERROR_LOAD_DATA}\n{error}")
+            return
+        self._data_loaded = True
         self._load_initial_data()
+        self._mark("data_loaded")
+        print("Khởi động: " + ", ".join(
+            f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.startup_metrics.items()
+        ))
     
     def _setup_callbacks(self):
         """Kết nối các callback từ View đến Controller"""
         # CRUD operations
-        self.view.on_add_note = self._handle_add_note
-        self.view.on_update_note = self._handle_update_note
-        self.view.on_delete_note = self._handle_delete_note
+        self.view.on_add_note = self._when_loaded(self._handle_add_note)
+        self.view.on_update_note = self._when_loaded(self._handle_update_note)
+        self.view.on_delete_note = self._when_loaded(self._handle_delete_note)
         
         # Toggle operations
-        self.view.on_toggle_completed = self._handle_toggle_completed
-        self.view.on_toggle_important = self._handle_toggle_important
+        self.view.on_toggle_completed = self._when_loaded(self._handle_toggle_completed)
+        self.view.on_toggle_important = self._when_loaded(self._handle_toggle_important)
         
-        # Filter and sort
-        self.view.on_filter_change = self._handle_filter_change
+        # Filter and sort (lúc đang tải chỉ ghi nhận, áp dụng khi tải xong)
+        self.view.on_filter_change = self._when_loaded(self._handle_filter_change, silent=True)
         self.view.on_sort_change = self._handle_sort_change
-        self.view.on_search = self._handle_search
+        self.view.on_search = self._when_loaded(self._handle_search, silent=True)
         
         # Attachments
-        self.view.on_add_attachment = self._handle_add_attachment
-        self.view.on_remove_attachment = self._handle_remove_attachment
+        self.view.on_add_attachment = self._when_loaded(self._handle_add_attachment)
+        self.view.on_remove_attachment = self._when_loaded(self._handle_remove_attachment)
+        self.view.get_attachment_thumbnail = self.controller.get_attachment_thumbnail
+        self.view.get_attachment_name = self.controller.get_attachment_name
+        
+        # Pagination (chỉ có tác dụng khi bảng lớn hơn PAGED_THRESHOLD)
+        self.view.on_load_more = self._handle_load_more
+        self.view.has_more_notes = lambda: self.controller.has_more_pages
         
         # Categories
-        self.view.on_add_category = self._handle_add_category
-        self.view.on_edit_category = self._handle_edit_category
-        self.view.on_delete_category = self._handle_delete_category
+        self.view.on_add_category = self._when_loaded(self._handle_add_category)
+        self.view.on_edit_category = self._when_loaded(self._handle_edit_category)
+        self.view.on_delete_category = self._when_loaded(self._handle_delete_category)
+    
+    def _when_loaded(self, handler: Callable, silent: bool = False) -> Callable:
+        """
+        Bọc callback để bỏ qua khi ghi chú còn đang tải nền: thay đổi lúc này
+        nằm trong index cũ và sẽ mất khi index mới được thay vào (silent: không báo)
+        """
+        def wrapper(*args, **kwargs):
+            if not self._data_loaded:
+                if not silent:
+                    messagebox.showinfo("Thông báo", Messages.WAIT_LOADING)
+                return False
+            return handler(*args, **kwargs)
+        return wrapper
     
     def _load_initial_data(self):
-        """Tải dữ liệu ban đầu"""
-        # Load all notes
-        notes = self.controller.get_filtered_notes("Tất cả")
-        self.view.display_notes(notes)
+        """Hiển thị dữ liệu ban đầu theo bộ lọc/sắp xếp/tìm kiếm người dùng đã chọn lúc đang tải"""
+        if self._pending_sort is not None:
+            self.controller.current_sort, self.controller.current_sort_reverse = self._pending_sort
+            self._pending_sort = None
+        keyword = self.view.search_entry.get()
+        if keyword.strip():
+            self.controller.current_filter = self.view.current_filter
+            self._handle_search(keyword)
+        else:
+            self._refresh_current_view()
         
         # Update categories
         categories = self.controller.get_categories()
         self.view.update_categories(categories)
     
+    def _handle_load_more(self):
+        """Cuộn tới cuối danh sách: tải và nối trang tiếp theo"""
+        self.view.append_notes(self.controller.next_page())
+    
     # ==================== CRUD Handlers ====================
     
     def _handle_add_note(self, title: str, current_filter: str):
@@ -112,9 +214,8 @@ class NoteApp:
     
     def _handle_update_note(self, note_id: str, **kwargs):
         """Xử lý cập nhật ghi chú"""
-        success = self.controller.update_note(note_id, **kwargs)
+        success = self._change_note(note_id, lambda: self.controller.update_note(note_id, **kwargs))
         if success:
-            self._refresh_current_view()
             # Update categories if changed
             categories = self.controller.get_categories()
             self.view.update_categories(categories)
@@ -128,7 +229,11 @@ class NoteApp:
         """Xử lý xóa ghi chú"""
         success = self.controller.delete_note(note_id)
         if success:
-            self._refresh_current_view()
+            if self.controller.paged:
+                # Giữ các trang đã tải và vị trí cuộn
+                self.view.remove_note(note_id)
+            else:
+                self._refresh_current_view()
             messagebox.showinfo("Thành công", Messages.NOTE_DELETED)
         else:
             messagebox.showerror("Lỗi", Messages.ERROR_DELETE_NOTE)
@@ -137,8 +242,7 @@ class NoteApp:
     
     def _handle_toggle_completed(self, note_id: str):
         """Xử lý toggle hoàn thành"""
-        self.controller.toggle_completed(note_id)
-        self._refresh_current_view()
+        self._change_note(note_id, lambda: self.controller.toggle_completed(note_id))
         
         # Update detail panel if open
         if self.view.selected_note_id == note_id:
@@ -148,8 +252,7 @@ class NoteApp:
     
     def _handle_toggle_important(self, note_id: str):
         """Xử lý toggle quan trọng"""
-        self.controller.toggle_important(note_id)
-        self._refresh_current_view()
+        self._change_note(note_id, lambda: self.controller.toggle_important(note_id))
         
         # Update detail panel if open
         if self.view.selected_note_id == note_id:
@@ -166,16 +269,22 @@ class NoteApp:
     
     def _handle_sort_change(self, sort_by: str, reverse: bool):
         """Xử lý thay đổi sắp xếp"""
+        if not self._data_loaded:
+            self._pending_sort = (sort_by, reverse)
+            return
         notes = self.controller.sort_notes(sort_by, reverse)
         self.view.display_notes(notes)
     
     def _handle_search(self, keyword: str):
-        """Xử lý tìm kiếm"""
-        if keyword:
-            notes = self.controller.search_by_keyword(keyword)
+        """Xử lý tìm kiếm (debounce + chạy nền, chỉ hiển thị kết quả mới nhất)"""
+        if keyword.strip():
+            self.search_pipeline.submit(keyword)
         else:
+            # Ô tìm kiếm trống (kể cả chỉ có khoảng trắng): bỏ tìm kiếm, hiện lại danh sách đang lọc
+            self.search_pipeline.cancel()
+            self.controller.search_scores = {}
             notes = self.controller.get_filtered_notes(self.view.current_filter)
-        self.view.display_notes(notes)
+            self.view.display_notes(notes)
     
     # ==================== Attachment Handlers ====================
     
@@ -188,12 +297,24 @@ class NoteApp:
                 messagebox.showerror("Lỗi", Messages.ERROR_FILE_TOO_LARGE)
                 return
         
-        result = self.controller.add_attachment(note_id, file_path, FileConstraints.ATTACHMENTS_DIR)
+        # Copy/băm/thumbnail/lưu chạy nền, kết quả quay về qua _on_attachment_added
+        self.view.show_attachment_progress(note_id, 0.0)
+        self.attachment_ingest.submit(
+            note_id,
+            file_path,
+            on_progress=self.view.show_attachment_progress,
+            on_done=self._on_attachment_added
+        )
+    
+    def _on_attachment_added(self, note_id: str, result: str):
+        """Callback khi thêm đính kèm xong (chạy trên main thread)"""
+        self.view.show_attachment_progress(note_id, None)
         if result:
+            self._show_note_change(note_id, ['attachments', 'updated_at'])
             messagebox.showinfo("Thành công", Messages.ATTACHMENT_ADDED)
             # Refresh detail panel
             note = self.controller.get_note(note_id)
-            if note:
+            if note and self.view.selected_note_id == note_id:
                 self.view.show_detail_panel(note)
         else:
             messagebox.showerror("Lỗi", Messages.ERROR_ADD_ATTACHMENT)
@@ -202,6 +323,7 @@ class NoteApp:
         """Xử lý xóa đính kèm"""
         success = self.controller.remove_attachment(note_id, file_path)
         if success:
+            self._show_note_change(note_id, ['attachments', 'updated_at'])
             messagebox.showinfo("Thành công", Messages.ATTACHMENT_REMOVED)
             # Refresh detail panel
             note = self.controller.get_note(note_id)
@@ -233,14 +355,12 @@ class NoteApp:
         if success:
             messagebox.showinfo("Thành công", f"Đã đổi tên danh mục '{old_name}' thành '{new_name}'")
             
-            # Reload all
-            self.controller.repository.load_notes()
-            
             # Refresh categories
             categories = self.controller.get_categories()
             self.view.update_categories(categories)
             
-            # Tự động click vào danh mục mới để reload giao diện
+            # Tự động click vào danh mục mới để reload giao diện (repository đã
+            # invalidate_cache nên danh sách được đọc lại từ DB, kể cả khi phân trang)
             self.view.select_category(new_name)
             
             return True
@@ -259,9 +379,6 @@ class NoteApp:
         if success:
             messagebox.showinfo("Thành công", f"Đã xóa danh mục '{category_name}'")
             
-            # Reload all notes from database
-            self.controller.repository.load_notes()
-            
             # Refresh categories
             categories = self.controller.get_categories()
             self.view.update_categories(categories)
@@ -280,9 +397,43 @@ class NoteApp:
         notes = self.controller.get_filtered_notes(self.view.current_filter)
         self.view.display_notes(notes)
     
+    def _change_note(self, note_id: str, action: Callable[[], bool]) -> bool:
+        """Chạy action sửa một ghi chú rồi làm mới danh sách theo các trường đã đổi"""
+        note = self.controller.get_note(note_id)
+        before = note.to_dict() if note else {}
+        success = action()
+        note = self.controller.get_note(note_id)
+        after = note.to_dict() if note else {}
+        self._show_note_change(note_id, [key for key in after if before.get(key) != after[key]])
+        return success
+    
+    def _show_note_change(self, note_id: str, fields: List[str]):
+        """Chỉ vẽ lại dòng của ghi chú nếu vị trí của nó trong danh sách không đổi"""
+        if not fields:
+            return
+        note = self.controller.get_note(note_id)
+        # Phân trang: mở lại trang đầu sẽ mất các trang đã tải và vị trí cuộn, nên
+        # chỉ vẽ lại dòng; thứ tự/bộ lọc được áp dụng lại ở lần đổi lọc hoặc sắp xếp sau
+        if note is None or (not self.controller.paged and self.controller.order_may_change(fields)):
+            self._refresh_current_view()
+        else:
+            self.view.refresh_note(note)
+    
+    def _on_close(self):
+        """Flush dữ liệu trước khi thoát; hỏi lại nếu không ghi được"""
+        if not self.repository.flush():
+            if not messagebox.askyesno("Cảnh báo", Messages.WARN_UNSAVED_CHANGES):
+                return
+        self.root.destroy()
+    
     def run(self):
         """Chạy ứng dụng"""
         self.root.mainloop()
+        self.search_pipeline.shutdown()
+        # Chờ các file đang copy dở ghi xong
+        self.attachment_ingest.shutdown(wait=True)
+        self.dispatcher.stop()
+        self.repository.close()
 
 
 def main():
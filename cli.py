@@ -0,0 +1,207 @@
+"""
+Command Line Interface
+Thao tác với ghi chú không cần giao diện (script, cron, server không có màn hình).
+Không import customtkinter/PIL để khởi động nhanh.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import NoteRepository
+from models.NoteTransfer import NDJSON, CSV, write_notes
+from controllers import NoteController
+from constants import DatabaseConfig, FilterType, Priority, SearchBackend
+
+TABLE = "table"
+SORT_FIELDS = ["created_at", "updated_at", "title", "priority", "due_date"]
+FILTERS = {
+    "all": FilterType.ALL,
+    "important": FilterType.IMPORTANT,
+    "completed": FilterType.COMPLETED,
+}
+
+
+def _add_output_format(parser: argparse.ArgumentParser):
+    parser.add_argument("--format", choices=[TABLE, NDJSON, CSV], default=TABLE)
+
+
+def _add_note_fields(parser: argparse.ArgumentParser):
+    parser.add_argument("--content")
+    parser.add_argument("--category")
+    parser.add_argument("--priority", choices=Priority.all())
+    parser.add_argument("--due", help="Ngày đến hạn YYYY-MM-DD")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Ứng dụng Ghi Chú - dòng lệnh")
+    parser.add_argument("--host", default=DatabaseConfig.HOST)
+    parser.add_argument("--user", default=DatabaseConfig.USER)
+    parser.add_argument("--password", default=DatabaseConfig.PASSWORD)
+    parser.add_argument("--database", default=DatabaseConfig.DATABASE)
+    
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    list_cmd = commands.add_parser("list", help="Liệt kê ghi chú")
+    list_cmd.add_argument("--filter", choices=list(FILTERS), default="all")
+    list_cmd.add_argument("--category", help="Chỉ lấy một danh mục (thay cho --filter)")
+    list_cmd.add_argument("--sort", choices=SORT_FIELDS, default="created_at")
+    list_cmd.add_argument("--reverse", action="store_true", help="Đảo thứ tự sắp xếp")
+    _add_output_format(list_cmd)
+    
+    search_cmd = commands.add_parser("search", help="Tìm theo tiêu đề/nội dung")
+    search_cmd.add_argument("keyword")
+    search_cmd.add_argument("--backend", choices=[SearchBackend.MEMORY, SearchBackend.FULLTEXT],
+                            help="Mặc định như giao diện (FULLTEXT khi bảng lớn và phải phân trang)")
+    search_cmd.add_argument("--page", type=int, default=0, help="Trang kết quả (chỉ FULLTEXT)")
+    _add_output_format(search_cmd)
+    
+    add_cmd = commands.add_parser("add", help="Thêm ghi chú")
+    add_cmd.add_argument("title")
+    _add_note_fields(add_cmd)
+    
+    update_cmd = commands.add_parser("update", help="Sửa ghi chú")
+    update_cmd.add_argument("note_id", type=int)
+    update_cmd.add_argument("--title")
+    _add_note_fields(update_cmd)
+    
+    complete_cmd = commands.add_parser("complete", help="Đánh dấu hoàn thành")
+    complete_cmd.add_argument("note_id", type=int)
+    complete_cmd.add_argument("--undo", action="store_true", help="Bỏ đánh dấu hoàn thành")
+    
+    delete_cmd = commands.add_parser("delete", help="Xóa ghi chú")
+    delete_cmd.add_argument("note_id", type=int)
+    
+    import_cmd = commands.add_parser("import", help="Nhập ghi chú từ NDJSON/CSV")
+    import_cmd.add_argument("path", help='File nguồn, "-" để đọc stdin')
+    import_cmd.add_argument("--format", choices=[NDJSON, CSV], help="Mặc định đoán theo đuôi file")
+    import_cmd.add_argument("--chunk-size", type=int, default=1000, help="Số ghi chú mỗi transaction")
+    
+    export_cmd = commands.add_parser("export", help="Xuất ghi chú ra NDJSON/CSV")
+    export_cmd.add_argument("path", help='File đích, "-" để ghi stdout')
+    export_cmd.add_argument("--format", choices=[NDJSON, CSV], help="Mặc định đoán theo đuôi file")
+    
+    return parser
+
+
+def print_notes(notes, fmt: str):
+    if fmt != TABLE:
+        write_notes(notes, "-", fmt)
+        return
+    for note in notes:
+        done = "x" if note.is_completed else " "
+        print(f"{note.note_id}\t[{done}]\t{note.priority}\t{note.category}\t{note.due_date or '-'}\t{note.title}")
+
+
+def _all_pages(controller: NoteController, first_page):
+    """Ở chế độ phân trang, đọc nối các trang để in đủ danh sách"""
+    yield from first_page
+    while controller.has_more_pages:
+        yield from controller.next_page()
+
+
+def _fail(message: str) -> int:
+    print(message, file=sys.stderr)
+    return 1
+
+
+def run_command(controller: NoteController, args) -> int:
+    if args.command == "list":
+        filter_type = args.category or FILTERS[args.filter]
+        controller.current_sort = args.sort
+        # Mặc định giống giao diện: mới nhất lên đầu
+        controller.current_sort_reverse = not args.reverse if args.sort == "created_at" else args.reverse
+        print_notes(_all_pages(controller, controller.get_filtered_notes(filter_type)), args.format)
+        return 0
+    
+    if args.command == "search":
+        if args.backend:
+            controller.search_backend = args.backend
+        print_notes(controller.search_by_keyword(args.keyword, page=args.page), args.format)
+        return 0
+    
+    if args.command == "add":
+        note = controller.create_note(
+            title=args.title,
+            content=args.content or "",
+            category=args.category,
+            priority=args.priority,
+            due_date=args.due
+        )
+        if not note:
+            return _fail("Không thể tạo ghi chú!")
+        print(note.note_id)
+        return 0
+    
+    if args.command in ("update", "complete", "delete"):
+        if not controller.get_note(args.note_id):
+            return _fail(f"Không tìm thấy ghi chú {args.note_id}")
+    
+    if args.command == "update":
+        ok = controller.update_note(
+            args.note_id,
+            title=args.title,
+            content=args.content,
+            category=args.category,
+            priority=args.priority,
+            due_date=args.due
+        )
+        return 0 if ok else _fail("Không thể lưu thay đổi!")
+    
+    if args.command == "complete":
+        ok = controller.update_note(args.note_id, is_completed=not args.undo)
+        return 0 if ok else _fail("Không thể lưu thay đổi!")
+    
+    if args.command == "delete":
+        return 0 if controller.delete_note(args.note_id) else _fail("Không thể xóa ghi chú!")
+    
+    start = time.perf_counter()
+    skipped = []
+    if args.command == "import":
+        def on_error(line_no: int, error: Exception):
+            skipped.append(line_no)
+            print(f"Bỏ qua dòng {line_no}: {error}", file=sys.stderr)
+        
+        count = controller.import_notes(args.path, args.format, args.chunk_size, on_error)
+        action = "Đã nhập"
+    else:
+        count = controller.export_notes(args.path, args.format)
+        action = "Đã xuất"
+    elapsed = time.perf_counter() - start
+    # stdout có thể đang là dữ liệu export nên thông báo ra stderr
+    print(f"{action} {count} ghi chú trong {elapsed:.2f}s", file=sys.stderr)
+    if skipped:
+        print(f"Bỏ qua {len(skipped)} dòng không đọc được", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    
+    repository = NoteRepository(
+        host=args.host,
+        user=args.user,
+        password=args.password,
+        database=args.database,
+        auto_load=False
+    )
+    controller = NoteController(repository)
+    if args.command in ("list", "search"):
+        controller.initialize()
+    else:
+        # Ghi một ghi chú và nhập/xuất đi thẳng xuống DB, không cần nạp ghi chú vào
+        # bộ nhớ (get_note_by_id tự đọc đúng một dòng khi chưa nạp)
+        repository.initialize(load=False)
+    
+    try:
+        return run_command(controller, args)
+    finally:
+        repository.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
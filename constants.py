@@ -4,6 +4,7 @@ Constants and Enums
 """
 
 from enum import Enum
+import os
 
 
 # ==================== Filter Types ======================================
@@ -89,6 +90,39 @@ class SortOption:
         }
 
 
+# ==================== Search ====================
+
+class SearchBackend:
+    """Backend tìm kiếm ghi chú"""
+    MEMORY = "memory"      # Chỉ mục ngược trong bộ nhớ
+    FULLTEXT = "fulltext"  # MySQL FULLTEXT (MATCH ... AGAINST)
+    
+    DEFAULT = MEMORY
+    PAGE_SIZE = 50
+
+
+# ==================== Persistence ====================
+
+class DatabaseConfig:
+    """Kết nối MySQL mặc định, ghi đè được bằng biến môi trường (cron, server)"""
+    HOST = os.environ.get("TODO_DB_HOST", "localhost")
+    USER = os.environ.get("TODO_DB_USER", "root")
+    PASSWORD = os.environ.get("TODO_DB_PASSWORD", "")
+    DATABASE = os.environ.get("TODO_DB_NAME", "todo_app_mvc")
+
+
+class WriteMode:
+    """Cách ghi thay đổi của ghi chú xuống MySQL"""
+    SYNC = "sync"                  # Mỗi lần sửa là một UPDATE + commit
+    WRITE_BEHIND = "write_behind"  # Sửa trong bộ nhớ, thread nền gom lại ghi theo lô
+    
+    DEFAULT = SYNC
+    # Độ bền ở chế độ WRITE_BEHIND: tối đa FLUSH_INTERVAL giây thay đổi chưa
+    # xuống DB, flush sớm khi có MAX_PENDING ghi chú chờ
+    FLUSH_INTERVAL = 0.5
+    MAX_PENDING = 200
+
+
 # ==================== File Constraints ====================
 
 class FileConstraints:
@@ -96,6 +130,11 @@ class FileConstraints:
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
     ALLOWED_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
     ATTACHMENTS_DIR = "attachments"
+    BLOBS_DIR = "attachments/blobs"
+    # Hardlink dùng chung inode với file gốc: sửa file gốc sẽ sửa luôn đính kèm
+    BLOB_ALLOW_HARDLINK = False
+    THUMBNAILS_DIR = "attachments/.thumbnails"
+    THUMBNAIL_SIZE = (120, 120)
 
 
 # ==================== UI Constants ====================
@@ -108,12 +147,28 @@ class UIConstants:
     
     # Sidebar
     SIDEBAR_WIDTH = 250
+    
+    # Search
+    SEARCH_DEBOUNCE_MS = 250
+    
+    # Images
+    IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    THUMBNAIL_SIZE = FileConstraints.THUMBNAIL_SIZE
+    IMAGE_VIEWER_MAX_SIZE = (1000, 800)
+    
+    # Note list: trên ngưỡng này danh sách tải theo trang (keyset) khi cuộn thay vì nạp hết
+    # (chỉ sắp xếp theo ngày tạo/ngày sửa có index, xem NoteRepository._keyset_order)
+    PAGED_THRESHOLD = 20000
+    NOTE_PAGE_SIZE = 100
+    # Lần tải đầu: số ghi chú mỗi lô được đổ dần vào danh sách trong lúc tải
+    LOAD_BATCH_SIZE = 500
 
 
 # ==================== Messages ====================
 
 class Messages:
     """Thông báo cho người dùng"""
+    LOADING = "Đang tải..."
     # Success
     NOTE_CREATED = "Đã tạo ghi chú mới!"
     NOTE_UPDATED = "Đã lưu thay đổi!"
@@ -130,12 +185,15 @@ class Messages:
     ERROR_TITLE_EMPTY = "Tiêu đề không được để trống!"
     ERROR_FILE_TOO_LARGE = "File quá lớn! Kích thước tối đa là 5MB."
     ERROR_NO_IMAGE = "File không phải hình ảnh hợp lệ!"
+    ERROR_LOAD_DATA = "Không thể tải dữ liệu từ cơ sở dữ liệu!"
     
     # Warning
     WARN_TITLE_REQUIRED = "Vui lòng nhập tiêu đề ghi chú!"
     WARN_CONFIRM_DELETE = "Bạn có chắc chắn muốn xóa ghi chú này?\nThao tác này không thể hoàn tác!"
     WARN_CONFIRM_DELETE_ATTACHMENT = "Bạn có chắc chắn muốn xóa file đính kèm này?"
+    WARN_UNSAVED_CHANGES = "Chưa ghi được một số thay đổi vào cơ sở dữ liệu.\nVẫn thoát và bỏ các thay đổi này?"
     
     # Info
     INFO_NO_NOTES = "Chưa có ghi chú nào"
     INFO_SEARCH_RESULTS = "Tìm thấy {} ghi chú"
+    WAIT_LOADING = "Đang tải ghi chú, vui lòng thử lại sau giây lát."
@@ -0,0 +1,57 @@
+"""
+Controller: AttachmentIngest
+Thêm file đính kèm trên worker pool để cửa sổ không bị treo khi copy file lớn
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from controllers.UiDispatcher import UiDispatcher
+
+
+class AttachmentIngest:
+    """
+    Chạy NoteController.add_attachment (copy, băm, thumbnail, lưu DB) trên
+    worker thread. Tiến độ và kết quả được chuyển về main thread qua
+    UiDispatcher nên các callback được phép cập nhật widget.
+    """
+    
+    def __init__(self, controller, dispatcher: UiDispatcher, max_workers: int = 2):
+        self.controller = controller
+        self.dispatcher = dispatcher
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+    
+    def submit(
+        self,
+        note_id,
+        source_file: str,
+        on_progress: Optional[Callable] = None,
+        on_done: Optional[Callable] = None
+    ) -> Future:
+        """on_progress(note_id, tỉ lệ 0..1), on_done(note_id, đường dẫn đã lưu hoặc None)"""
+        return self._executor.submit(
+            self._run, note_id, source_file, on_progress, on_done
+        )
+    
+    def _run(self, note_id, source_file, on_progress, on_done):
+        last_percent = -1
+        
+        def progress(fraction: float):
+            nonlocal last_percent
+            percent = int(fraction * 100)
+            # Chỉ báo khi đổi ít nhất 1% để không làm ngập hàng đợi UI
+            if on_progress and percent != last_percent:
+                last_percent = percent
+                self.dispatcher.post(on_progress, note_id, fraction)
+        
+        result = None
+        try:
+            result = self.controller.add_attachment(note_id, source_file, progress=progress)
+        except Exception as e:
+            print(f"Lỗi khi thêm đính kèm: {e}")
+        if on_done:
+            self.dispatcher.post(on_done, note_id, result)
+        return result
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
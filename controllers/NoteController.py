@@ -3,26 +3,71 @@ Controller: NoteController
 Điều khiển logic nghiệp vụ và kết nối Model-View
 """
 
-from typing import List, Optional
-from datetime import datetime, date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import date
 from models.Note import Note
 from models.NoteRepository import NoteRepository
+from models.NoteQueryEngine import SORT_FIELDS
+from models.ThumbnailStore import ThumbnailStore
+from models.BlobStore import BlobStore
+from models.NoteTransfer import read_notes, write_notes
+from contextlib import nullcontext
 import os
-import shutil
 import sys
+import threading
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from constants import FilterType, Priority
+from constants import FilterType, Priority, SearchBackend, FileConstraints, UIConstants
 
 
 class NoteController:
     """Lớp điều khiển các thao tác với ghi chú"""
     
-    def __init__(self, repository: NoteRepository):
+    def __init__(self, repository: NoteRepository, search_backend: str = SearchBackend.DEFAULT,
+                 search_page_size: int = SearchBackend.PAGE_SIZE,
+                 thumbnail_store: Optional[ThumbnailStore] = None,
+                 blob_store: Optional[BlobStore] = None,
+                 paged_threshold: int = UIConstants.PAGED_THRESHOLD,
+                 page_size: int = UIConstants.NOTE_PAGE_SIZE):
         self.repository = repository
         self.current_filter = FilterType.ALL
         self.current_sort = "created_at"
         self.current_sort_reverse = True
+        self.search_backend = search_backend
+        self.search_page_size = search_page_size
+        # note_id -> relevance của lần tìm kiếm FULLTEXT gần nhất
+        self.search_scores: Dict[int, float] = {}
+        self.thumbnails = thumbnail_store or ThumbnailStore(
+            FileConstraints.THUMBNAILS_DIR, FileConstraints.THUMBNAIL_SIZE
+        )
+        # Chế độ phân trang: chỉ giữ các trang đã xem, tải tiếp khi cuộn
+        self.paged_threshold = paged_threshold
+        self.page_size = page_size
+        self.paged = False
+        self._page_query: Optional[tuple] = None
+        self._page_cursor: Optional[tuple] = None
+        # (từ khóa, trang) kế tiếp của kết quả FULLTEXT đang hiển thị, None nếu đã hết
+        self._search_more: Optional[Tuple[str, int]] = None
+        self.blobs = blob_store or BlobStore(
+            FileConstraints.BLOBS_DIR, allow_hardlink=FileConstraints.BLOB_ALLOW_HARDLINK
+        )
+        # Khóa theo sha256 (chia sọc) để "put -> ghi DB" và "đếm tham chiếu -> xóa blob"
+        # của cùng một blob không xen kẽ nhau giữa worker đính kèm và main thread
+        self._blob_locks = [threading.RLock() for _ in range(64)]
+    
+    def initialize(self, on_batch: Optional[Callable[[List[Note]], None]] = None):
+        """
+        Chạy ở thread nền lúc khởi động: kiểm tra schema, rồi nạp toàn bộ ghi chú
+        hoặc bật chế độ phân trang nếu bảng quá lớn. on_batch nhận từng lô ghi
+        chú (thứ tự mặc định) trong lúc nạp, gọi trên chính thread nền này.
+        """
+        self.repository.initialize(load=False)
+        self.paged = self.repository.count_notes() > self.paged_threshold
+        if self.paged:
+            # Chỉ mục tìm kiếm trong bộ nhớ không có đủ ghi chú
+            self.search_backend = SearchBackend.FULLTEXT
+        else:
+            self.repository.load_notes(on_batch, UIConstants.LOAD_BATCH_SIZE)
     
     # ==================== CRUD Operations ====================
     
@@ -84,15 +129,16 @@ class NoteController:
     
     def delete_note(self, note_id: str) -> bool:
         note = self.repository.get_note_by_id(note_id)
-        if note:
-            for attachment in note.attachments:
-                try:
-                    if os.path.exists(attachment):
-                        os.remove(attachment)
-                except Exception as e:
-                    print(f"Không thể xóa file {attachment}: {e}")
-            return self.repository.delete_note(note_id)
-        return False
+        if not note:
+            return False
+        
+        attachments = list(note.attachments)
+        # Xóa DB trước (CASCADE xóa các dòng attachments) rồi mới dọn file
+        if not self.repository.delete_note(note_id):
+            return False
+        for attachment in attachments:
+            self._release_attachment_file(attachment)
+        return True
     
     def get_note(self, note_id: str) -> Optional[Note]:
         """Lấy thông tin một ghi chú"""
@@ -121,6 +167,7 @@ class NoteController:
             filter_type = FilterType.ALL
             
         self.current_filter = filter_type
+        self._search_more = None
         
         # Xác định filter_type và category cho query
         query_filter_type = None
@@ -133,26 +180,103 @@ class NoteController:
         elif filter_type != FilterType.ALL:
             query_category = filter_type
         
-        # Query DB với filter và sort
-        return self.repository.sort_notes(
+        if self.paged:
+            return self._open_pages(query_filter_type, query_category)
+        
+        # Lọc và sắp xếp trên dữ liệu đã tải, chỉ query DB khi cache bị vô hiệu
+        return self.repository.query_notes(
             self.current_sort,
             self.current_sort_reverse,
             filter_type=query_filter_type,
             category=query_category
         )
     
+    def order_may_change(self, fields: Iterable[str]) -> bool:
+        """
+        Sửa các trường fields của một ghi chú có thể làm nó đổi vị trí, hoặc
+        ra/vào danh sách đang lọc, hay không
+        """
+        relevant = set(SORT_FIELDS.get(self.current_sort, SORT_FIELDS["created_at"]))
+        if self.current_filter == FilterType.IMPORTANT:
+            relevant.add('priority')
+        elif self.current_filter == FilterType.COMPLETED:
+            relevant.add('is_completed')
+        elif self.current_filter != FilterType.ALL:
+            relevant.add('category')
+        return not relevant.isdisjoint(fields)
+    
     def sort_notes(self, sort_by: str, reverse: bool = False) -> List[Note]:
         self.current_sort = sort_by
         self.current_sort_reverse = reverse
         return self.get_filtered_notes(self.current_filter)
     
+    # ==================== Pagination ====================
+    
+    def _open_pages(self, filter_type: Optional[str], category: Optional[str]) -> List[Note]:
+        """Trang đầu của truy vấn hiện tại; các trang sau lấy bằng next_page()"""
+        self._page_query = (self.current_sort, self.current_sort_reverse, filter_type, category)
+        self._page_cursor = None
+        return self._fetch_page()
+    
+    def _fetch_page(self) -> List[Note]:
+        sort_by, reverse, filter_type, category = self._page_query
+        notes, self._page_cursor = self.repository.fetch_notes_page(
+            sort_by, reverse, filter_type, category,
+            after=self._page_cursor,
+            limit=self.page_size
+        )
+        if self._page_cursor is None:
+            self._page_query = None
+        return notes
+    
+    @property
+    def has_more_pages(self) -> bool:
+        return self._page_query is not None or self._search_more is not None
+    
+    def next_page(self) -> List[Note]:
+        """Trang kế tiếp của danh sách (hoặc kết quả tìm kiếm) đang hiển thị, rỗng nếu đã hết"""
+        if self._search_more is not None:
+            notes, scores, self._search_more = self.run_search(*self._search_more)
+            self.search_scores.update(scores)
+            return notes
+        if self._page_query is None:
+            return []
+        return self._fetch_page()
+    
     # ==================== Search ====================
     
-    def search_by_keyword(self, keyword: str) -> List[Note]:
+    def search_by_keyword(self, keyword: str, page: int = 0) -> List[Note]:
         if not keyword or not keyword.strip():
+            self.search_scores = {}
             return self.get_filtered_notes(self.current_filter)
+        return self.apply_search(self.run_search(keyword, page))
+    
+    def run_search(self, keyword: str, page: int = 0) -> Tuple[List[Note], Dict[int, float], Optional[Tuple[str, int]]]:
+        """
+        Chỉ gọi repository, không đổi trạng thái của controller nên chạy được
+        trên worker thread (SearchPipeline). Trả về (ghi chú, relevance theo
+        note_id, (từ khóa, trang kế tiếp) hoặc None nếu không còn kết quả).
+        """
+        if self.search_backend == SearchBackend.FULLTEXT:
+            results = self.repository.search_notes_fulltext(
+                keyword.strip(),
+                limit=self.search_page_size,
+                offset=page * self.search_page_size
+            )
+            # Kết quả đã theo thứ tự relevance giảm dần; đủ một trang thì có thể còn trang sau
+            more = (keyword, page + 1) if len(results) >= self.search_page_size else None
+            return [note for note, _ in results], {note.note_id: score for note, score in results}, more
         
-        return self.repository.search_notes(keyword.strip())
+        notes = self.repository.search_notes(keyword.strip())
+        return self.repository.sort_in_memory(notes, self.current_sort, self.current_sort_reverse), {}, None
+    
+    def apply_search(self, result: Tuple[List[Note], Dict[int, float], Optional[Tuple[str, int]]]) -> List[Note]:
+        """Ghi nhận kết quả của run_search (main thread), trả về danh sách để hiển thị"""
+        notes, self.search_scores, self._search_more = result
+        # Kết quả tìm kiếm không nối tiếp các trang của danh sách trước đó;
+        # cuộn tới cuối sẽ lấy trang kết quả kế tiếp qua next_page()
+        self._page_query = None
+        return notes
     
     def search_by_date(
         self, 
@@ -170,26 +294,43 @@ class NoteController:
         self, 
         note_id: str, 
         source_file: str,
-        attachments_dir: str = "attachments"
+        progress: Optional[Callable[[float], None]] = None
     ) -> Optional[str]:
-        
+        """
+        Đưa file vào BlobStore (bỏ qua copy nếu đã có cùng nội dung), tạo
+        thumbnail và lưu DB. Không đụng tới widget nên có thể chạy trên worker
+        thread (xem AttachmentIngest); progress nhận tỉ lệ 0..1.
+        """
         note = self.repository.get_note_by_id(note_id)
         if not note or not os.path.exists(source_file):
             return None
         
         try:
-            os.makedirs(attachments_dir, exist_ok=True)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = os.path.basename(source_file)
-            name, ext = os.path.splitext(file_name)
-            unique_name = f"{timestamp}_{name}{ext}"
-            dest_path = os.path.join(attachments_dir, unique_name)
+            file_size = os.path.getsize(source_file)
             
-            shutil.copy2(source_file, dest_path)
+            def on_progress(fraction: float):
+                if progress:
+                    progress(fraction * 0.9)
             
-            note.add_attachment(dest_path)
-            self.repository.update_note(note_id, attachments=note.attachments)
+            dest_path, digest, created = self.blobs.put(source_file, on_progress)
+            with self._blob_lock(digest):
+                if not os.path.exists(dest_path):
+                    # Blob có sẵn vừa bị xóa (tham chiếu cuối bị gỡ) trước khi kịp ghi DB
+                    dest_path, digest, created = self.blobs.put(source_file)
+                # Tạo thumbnail một lần ngay khi thêm, view chỉ cần đọc file nhỏ
+                self.thumbnails.ensure(dest_path, digest=digest)
+                
+                if not self.repository.add_attachment(
+                    note_id, dest_path,
+                    file_size=file_size,
+                    file_name=os.path.basename(source_file),
+                    content_hash=digest
+                ):
+                    if created:
+                        self._release_attachment_file(dest_path)
+                    return None
+            if progress:
+                progress(1.0)
             
             return dest_path
         except Exception as e:
@@ -201,15 +342,88 @@ class NoteController:
         if not note:
             return False
         
+        if not self.repository.remove_attachment(note_id, file_path):
+            return False
+        self._release_attachment_file(file_path)
+        return True
+    
+    def _release_attachment_file(self, file_path: str):
+        """Xóa file khi không còn dòng attachments nào trỏ tới (blob có thể dùng chung)"""
         try:
-            if os.path.exists(file_path):
+            digest = self.blobs.digest_of(file_path)
+            with self._blob_lock(digest) if digest is not None else nullcontext():
+                if self.repository.count_attachment_references(digest, file_path) > 0:
+                    return
+                self.thumbnails.discard(file_path)
+                if digest is not None:
+                    self.blobs.delete(file_path)
+                    return
+            # File cũ (attachments/<timestamp>_<tên>); đường dẫn ngoài thư mục
+            # đính kèm (ví dụ nhập từ file) là file của người dùng, không xóa
+            if self._is_managed_file(file_path) and os.path.exists(file_path):
                 os.remove(file_path)
-            
-            note.remove_attachment(file_path)
-            return self.repository.update_note(note_id, attachments=note.attachments)
         except Exception as e:
-            print(f"Lỗi khi xóa đính kèm: {e}")
-            return False
+            print(f"Không thể xóa file {file_path}: {e}")
+    
+    def _blob_lock(self, digest: str) -> threading.RLock:
+        return self._blob_locks[int(digest[:2], 16) % len(self._blob_locks)]
+    
+    @staticmethod
+    def _is_managed_file(file_path: str) -> bool:
+        root = os.path.abspath(FileConstraints.ATTACHMENTS_DIR)
+        return os.path.abspath(file_path).startswith(root + os.sep)
+    
+    def get_attachment_stats(self) -> dict:
+        """Chiến lược copy đã dùng và số byte đã ghi/dùng chung/khử trùng"""
+        return self.blobs.stats()
+    
+    def get_attachment_name(self, note_id: str, file_path: str) -> str:
+        """Tên file gốc để hiển thị (blob được đặt tên theo sha256)"""
+        return self.repository.get_attachment_name(note_id, file_path)
+    
+    def get_attachment_thumbnail(self, file_path: str) -> Optional[str]:
+        """Đường dẫn thumbnail đã lưu; đính kèm cũ chưa có thumbnail sẽ được tạo một lần"""
+        return self.thumbnails.get(file_path) or self.thumbnails.ensure(file_path)
+    
+    # ==================== Import / Export ====================
+    
+    def import_notes(self, path: str, fmt: Optional[str] = None, chunk_size: int = 1000,
+                     on_error: Optional[Callable[[int, Exception], None]] = None) -> int:
+        """
+        Nhập ghi chú từ file NDJSON/CSV ("-" là stdin), trả về số ghi chú đã thêm.
+        Dòng không đọc được bị bỏ qua và báo qua on_error(số dòng, lỗi).
+        """
+        return self.repository.add_notes_bulk(
+            read_notes(path, fmt, on_error),
+            chunk_size,
+            prepare_attachment=self._import_attachment,
+            release_attachment=self._release_attachment_file
+        )
+    
+    def _import_attachment(self, source_file: str) -> tuple:
+        """
+        Đính kèm của ghi chú nhập vào được đưa vào kho blob như khi thêm bằng
+        tay, để có content_hash và đếm tham chiếu đúng khi xóa.
+        Trả về (file_path, file_size, file_name, content_hash).
+        """
+        if not os.path.exists(source_file):
+            raise FileNotFoundError(f"Không tìm thấy file {source_file}")
+        file_size = os.path.getsize(source_file)
+        digest = self.blobs.digest_of(source_file)
+        if digest is not None:
+            # Đã nằm trong kho (xuất rồi nhập lại trên cùng máy). Lưu đường dẫn chuẩn
+            # của blob vì đếm tham chiếu so khớp nguyên chuỗi file_path
+            ext = os.path.splitext(source_file)[1]
+            return self.blobs.blob_path(digest, ext), file_size, os.path.basename(source_file), digest
+        dest_path, digest, _ = self.blobs.put(source_file)
+        return dest_path, file_size, os.path.basename(source_file), digest
+    
+    def export_notes(self, path: str, fmt: Optional[str] = None) -> int:
+        """
+        Xuất toàn bộ ghi chú ra NDJSON/CSV ("-" là stdout), trả về số ghi chú đã ghi.
+        Đọc thẳng từ DB theo luồng nên không cần nạp hết ghi chú vào bộ nhớ.
+        """
+        return write_notes(self.repository.iter_notes(), path, fmt)
     
     # ==================== Categories ====================
     
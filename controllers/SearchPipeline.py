@@ -0,0 +1,91 @@
+"""
+Controller: SearchPipeline
+Tìm kiếm có debounce, chạy nền và bỏ kết quả đã cũ
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from controllers.UiDispatcher import UiDispatcher
+
+
+class SearchPipeline:
+    """
+    Mỗi lần gõ phím chỉ hẹn giờ lại (debounce). Khi hết thời gian chờ, từ khóa
+    được tìm trên worker thread; kết quả chỉ được giao cho on_results nếu chưa
+    có từ khóa mới hơn. search_fn không được đổi trạng thái dùng chung; việc đó
+    để cho apply_fn, chạy trên main thread ngay trước on_results.
+    """
+    
+    def __init__(
+        self,
+        root,
+        dispatcher: UiDispatcher,
+        search_fn: Callable[[str], object],
+        on_results: Callable[[List], None],
+        debounce_ms: int = 250,
+        apply_fn: Optional[Callable[[object], List]] = None
+    ):
+        self.root = root
+        self.dispatcher = dispatcher
+        self.search_fn = search_fn
+        self.on_results = on_results
+        self.apply_fn = apply_fn
+        self.debounce_ms = debounce_ms
+        
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        # Tăng ở mỗi lần submit/cancel; kết quả mang generation cũ bị bỏ
+        self._generation = 0
+        self._after_id = None
+        self._future: Optional[Future] = None
+    
+    def submit(self, keyword: str):
+        """Gọi từ main thread ở mỗi lần từ khóa thay đổi"""
+        self._generation += 1
+        self._cancel_timer()
+        self._after_id = self.root.after(self.debounce_ms, self._start, self._generation, keyword)
+    
+    def cancel(self):
+        """Hủy mọi tìm kiếm đang chờ hoặc đang chạy"""
+        self._generation += 1
+        self._cancel_timer()
+        if self._future is not None:
+            self._future.cancel()
+    
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+    
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+    
+    def _start(self, generation: int, keyword: str):
+        self._after_id = None
+        if generation != self._generation:
+            return
+        if self._future is not None:
+            # Chỉ hủy được nếu chưa chạy; nếu đang chạy, kết quả sẽ bị bỏ khi giao
+            self._future.cancel()
+        self._future = self._executor.submit(self._run, generation, keyword)
+    
+    def _run(self, generation: int, keyword: str):
+        if generation != self._generation:
+            return
+        try:
+            results = self.search_fn(keyword)
+        except Exception as e:
+            print(f"Lỗi khi tìm kiếm: {e}")
+            return
+        self.dispatcher.post(self._deliver, generation, results)
+    
+    def _deliver(self, generation: int, results):
+        if generation != self._generation:
+            return
+        if self.apply_fn is not None:
+            results = self.apply_fn(results)
+        self.on_results(results)
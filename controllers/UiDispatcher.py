@@ -0,0 +1,47 @@
+"""
+Controller: UiDispatcher
+Chuyển kết quả từ worker thread về main thread của Tk
+"""
+
+import queue
+
+
+class UiDispatcher:
+    """
+    Tkinter không an toàn khi gọi từ thread khác, nên worker chỉ đưa callback
+    vào hàng đợi; main thread lấy ra và chạy qua root.after.
+    """
+    
+    def __init__(self, root, poll_ms: int = 30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._queue: "queue.Queue" = queue.Queue()
+        self._after_id = None
+    
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.poll_ms, self._drain)
+    
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+    
+    def post(self, callback, *args):
+        """Gọi được từ bất kỳ thread nào"""
+        self._queue.put((callback, args))
+    
+    def _drain(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Lỗi khi xử lý callback: {e}")
+        self._after_id = self.root.after(self.poll_ms, self._drain)
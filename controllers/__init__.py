@@ -4,5 +4,8 @@ Chứa các lớp điều khiển logic nghiệp vụ
 """
 
 from controllers.NoteController import NoteController
+from controllers.UiDispatcher import UiDispatcher
+from controllers.SearchPipeline import SearchPipeline
+from controllers.AttachmentIngest import AttachmentIngest
 
-__all__ = ['NoteController']
+__all__ = ['NoteController', 'UiDispatcher', 'SearchPipeline', 'AttachmentIngest']
@@ -0,0 +1,134 @@
+"""
+Model: BlobStore
+Kho file đính kèm đánh địa chỉ theo nội dung (sha256), file trùng chỉ lưu một lần
+"""
+
+import os
+import re
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from models.FileCopy import BUFFERED, copy_file
+from models.FileHash import copy_with_digest, file_digest
+
+_BLOB_NAME_RE = re.compile(r'^([0-9a-f]{64})(\.[^.]*)?$')
+
+
+class BlobStore:
+    """
+    Mỗi blob nằm ở <root>/<2 ký tự đầu>/<sha256><đuôi file>. Đuôi file được giữ
+    để mở bằng ứng dụng mặc định và nhận diện ảnh. Số tham chiếu không lưu ở
+    đây mà đếm trong bảng attachments (cột content_hash), nên BlobStore chỉ lo
+    ghi/xóa file.
+    """
+    
+    def __init__(self, root_dir: str, allow_hardlink: bool = False):
+        self.root_dir = root_dir
+        self.allow_hardlink = allow_hardlink
+        self._lock = threading.Lock()
+        # Chiến lược copy -> số lần dùng; byte thực sự ghi / byte không cần ghi
+        self._strategies: Dict[str, int] = {}
+        self._bytes_written = 0
+        self._bytes_shared = 0
+        self._dedup_hits = 0
+        self._dedup_bytes = 0
+    
+    def blob_path(self, digest: str, ext: str = "") -> str:
+        return os.path.join(self.root_dir, digest[:2], f"{digest}{ext.lower()}")
+    
+    def contains(self, path: str) -> bool:
+        root = os.path.abspath(self.root_dir)
+        return os.path.abspath(path).startswith(root + os.sep)
+    
+    def digest_of(self, path: str) -> Optional[str]:
+        """sha256 lấy từ tên blob, None nếu path không thuộc kho"""
+        if not self.contains(path):
+            return None
+        match = _BLOB_NAME_RE.match(os.path.basename(path))
+        return match.group(1) if match else None
+    
+    def put(self, source: str, progress: Optional[Callable[[float], None]] = None) -> Tuple[str, str, bool]:
+        """
+        Băm file nguồn theo luồng rồi chỉ copy khi blob chưa tồn tại.
+        Trả về (đường dẫn blob, sha256, True nếu vừa ghi file mới);
+        progress nhận tỉ lệ 0..1 (nửa đầu là băm, nửa sau là copy).
+        """
+        total = max(os.path.getsize(source), 1)
+        done = 0
+        
+        def on_chunk(nbytes: int):
+            nonlocal done
+            done += nbytes
+            if progress:
+                progress(min(done / (2 * total), 1.0))
+        
+        ext = os.path.splitext(source)[1]
+        before = os.stat(source)
+        digest = file_digest(source, on_chunk)
+        path = self.blob_path(digest, ext)
+        if os.path.exists(path):
+            self._record_dedup(before.st_size)
+            if progress:
+                progress(1.0)
+            return path, digest, False
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            strategy, written = copy_file(source, tmp_path, self.allow_hardlink, on_chunk)
+            after = os.stat(source)
+            if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+                # File nguồn bị sửa giữa lúc băm và copy: copy lại kèm băm để tên blob khớp nội dung
+                os.remove(tmp_path)
+                digest = copy_with_digest(source, tmp_path)
+                strategy, written = BUFFERED, after.st_size
+                path = self.blob_path(digest, ext)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._lock:
+                self._strategies[strategy] = self._strategies.get(strategy, 0) + 1
+                self._bytes_written += written
+                if written == 0:
+                    # reflink/hardlink: dữ liệu dùng chung với file nguồn
+                    self._bytes_shared += before.st_size
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    self._dedup_hits += 1
+                    self._dedup_bytes += before.st_size
+                    return path, digest, False
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if progress:
+            progress(1.0)
+        return path, digest, True
+    
+    def _record_dedup(self, nbytes: int):
+        with self._lock:
+            self._dedup_hits += 1
+            self._dedup_bytes += nbytes
+    
+    def delete(self, path: str):
+        """Xóa blob (gọi khi không còn tham chiếu) và thư mục con nếu đã rỗng"""
+        if not self.contains(path):
+            return
+        with self._lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'strategies': dict(self._strategies),
+                'bytes_written': self._bytes_written,
+                'bytes_shared': self._bytes_shared,
+                'dedup_hits': self._dedup_hits,
+                'dedup_bytes': self._dedup_bytes,
+            }
@@ -0,0 +1,155 @@
+"""
+Model: ConnectionPool
+Pool kết nối MySQL dùng chung cho NoteRepository
+"""
+
+import mysql.connector
+import queue
+import threading
+import time
+
+
+class PooledConnection:
+    """Kết nối mượn từ pool, close() sẽ trả kết nối về pool thay vì đóng socket"""
+    
+    def __init__(self, pool: 'ConnectionPool', conn):
+        self._pool = pool
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise mysql.connector.InterfaceError("Kết nối đã được trả về pool")
+        return getattr(self._conn, name)
+    
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._release(conn)
+    
+    def invalidate(self):
+        """Bỏ kết nối (ví dụ còn kết quả chưa đọc), pool sẽ mở kết nối mới khi cần"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._discard(conn)
+    
+    def __del__(self):
+        # Trả kết nối về pool nếu caller quên close() (ví dụ khi có exception)
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool kết nối MySQL có kiểm tra sức khỏe khi mượn và thống kê thời gian chờ"""
+    
+    def __init__(self, pool_size: int = 5, checkout_timeout: float = 10.0, **connect_args):
+        if pool_size < 1:
+            raise ValueError("pool_size phải >= 1")
+        
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.connect_args = connect_args
+        
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'reconnects': 0,
+            'discarded': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+        }
+    
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        self._incr('created')
+        return conn
+    
+    def _incr(self, key: str, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+    
+    def _is_healthy(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+    
+    def get_connection(self) -> PooledConnection:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise mysql.connector.PoolError(
+                f"Hết kết nối trong pool (pool_size={self.pool_size})"
+            )
+        
+        try:
+            conn = None
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            
+            if conn is not None and not self._is_healthy(conn):
+                # Socket đã cũ (server timeout, mất mạng...) -> mở kết nối mới
+                self._close_quietly(conn)
+                self._incr('reconnects')
+                conn = None
+            
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait'] += wait
+            self._stats['max_wait'] = max(self._stats['max_wait'], wait)
+        
+        return PooledConnection(self, conn)
+    
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except Exception:
+            self._close_quietly(conn)
+            self._incr('discarded')
+        finally:
+            self._slots.release()
+    
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        self._incr('discarded')
+        self._slots.release()
+    
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def close_all(self):
+        """Đóng toàn bộ kết nối đang rảnh"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
+    
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        checkouts = stats['checkouts']
+        stats['avg_wait'] = stats['total_wait'] / checkouts if checkouts else 0.0
+        stats['idle'] = self._idle.qsize()
+        stats['pool_size'] = self.pool_size
+        return stats
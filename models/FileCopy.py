@@ -0,0 +1,103 @@
+"""
+Model: FileCopy
+Copy file với chiến lược rẻ nhất mà hệ thống file hỗ trợ
+"""
+
+import os
+import shutil
+from typing import Callable, Optional, Tuple
+
+from models.FileHash import CHUNK_SIZE
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Các chiến lược, theo thứ tự được thử
+REFLINK = "reflink"                    # FICLONE: chia sẻ extent, không copy byte nào
+HARDLINK = "hardlink"                  # Cùng inode với file nguồn (phải bật riêng)
+COPY_FILE_RANGE = "copy_file_range"    # Copy trong kernel, không qua user space
+BUFFERED = "buffered"                  # Đọc/ghi từng khối
+
+# _IOW(0x94, 9, int) trong linux/fs.h
+FICLONE = 0x40049409
+
+
+def _reflink(source: str, dest: str) -> bool:
+    if fcntl is None:
+        return False
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(dest)
+    return False
+
+
+def _hardlink(source: str, dest: str) -> bool:
+    try:
+        os.link(source, dest)
+        return True
+    except OSError:
+        # Khác ổ đĩa, hệ thống file không hỗ trợ, không đủ quyền...
+        return False
+
+
+def _copy_file_range(source: str, dest: str, progress: Optional[Callable[[int], None]]) -> bool:
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        copied = 0
+        try:
+            while True:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), CHUNK_SIZE)
+                if n == 0:
+                    return True
+                copied += n
+                if progress:
+                    progress(n)
+        except OSError:
+            # Chỉ bỏ qua được khi chưa ghi gì, nếu không để buffered copy ghi đè lại
+            if copied:
+                raise
+    os.remove(dest)
+    return False
+
+
+def _buffered(source: str, dest: str, progress: Optional[Callable[[int], None]]):
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(chunk)
+            if progress:
+                progress(len(chunk))
+
+
+def copy_file(
+    source: str,
+    dest: str,
+    allow_hardlink: bool = False,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[str, int]:
+    """
+    Copy source -> dest (dest chưa tồn tại). Trả về (chiến lược, số byte thực sự
+    được ghi). Hardlink chỉ dùng khi allow_hardlink vì sửa file nguồn sẽ sửa luôn
+    bản lưu. progress(bytes) chỉ được gọi với các chiến lược copy dữ liệu.
+    """
+    if _reflink(source, dest):
+        shutil.copystat(source, dest)
+        return REFLINK, 0
+    if allow_hardlink and _hardlink(source, dest):
+        return HARDLINK, 0
+    size = os.path.getsize(source)
+    if _copy_file_range(source, dest, progress):
+        shutil.copystat(source, dest)
+        return COPY_FILE_RANGE, size
+    _buffered(source, dest, progress)
+    shutil.copystat(source, dest)
+    return BUFFERED, size
@@ -0,0 +1,40 @@
+"""
+Model: FileHash
+Băm nội dung file theo luồng (không đọc cả file vào bộ nhớ)
+"""
+
+import hashlib
+import shutil
+from typing import Callable, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str, progress: Optional[Callable[[int], None]] = None) -> str:
+    """sha256 hex của file; progress(bytes_read) được gọi sau mỗi khối nếu có"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if progress:
+                progress(len(chunk))
+    return digest.hexdigest()
+
+
+def copy_with_digest(source: str, dest: str, progress: Optional[Callable[[int], None]] = None) -> str:
+    """Copy file và băm sha256 trong cùng một lượt đọc, giữ metadata như shutil.copy2"""
+    digest = hashlib.sha256()
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            if progress:
+                progress(len(chunk))
+    shutil.copystat(source, dest)
+    return digest.hexdigest()
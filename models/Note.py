@@ -4,12 +4,27 @@ Model: Note (Ghi chú)
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, Sequence
+import sys
 import uuid
 
 
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Tên danh mục/mức ưu tiên lặp lại ở mọi ghi chú: dùng chung một đối tượng chuỗi
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class Note:
-    """Lớp ghi chú"""
+    """
+    Lớp ghi chú. Dùng __slots__ (không có __dict__) vì có thể có hàng trăm
+    nghìn đối tượng trong bộ nhớ; category/priority được intern và attachments
+    là tuple (mặc định là tuple rỗng dùng chung).
+    """
+    
+    __slots__ = (
+        'note_id', 'title', 'content', 'category', 'priority',
+        'created_at', 'updated_at', 'is_completed', 'due_date', 'attachments'
+    )
     
     def __init__(
         self,
@@ -22,19 +37,19 @@ class Note:
         updated_at: Optional[datetime] = None,
         is_completed: bool = False,
         due_date: Optional[str] = None,
-        attachments: Optional[List[str]] = None
+        attachments: Optional[Sequence[str]] = None
     ):
         
         self.note_id = note_id
         self.title = title
         self.content = content
-        self.category = category
-        self.priority = priority
+        self.category = _intern(category)
+        self.priority = _intern(priority)
         self.created_at = created_at or datetime.now()
         self.updated_at = updated_at or datetime.now()
         self.is_completed = is_completed
         self.due_date = due_date
-        self.attachments = attachments or []
+        self.attachments = tuple(attachments) if attachments else ()
     
     def to_dict(self) -> dict:
         return {
@@ -47,7 +62,7 @@ class Note:
             'updated_at': self.updated_at.isoformat() if isinstance(self.updated_at, datetime) else self.updated_at,
             'is_completed': self.is_completed,
             'due_date': self.due_date,
-            'attachments': self.attachments
+            'attachments': list(self.attachments)
         }
     
     @classmethod
@@ -87,9 +102,9 @@ class Note:
         if content is not None:
             self.content = content
         if category is not None:
-            self.category = category
+            self.category = _intern(category)
         if priority is not None:
-            self.priority = priority
+            self.priority = _intern(priority)
         if is_completed is not None:
             self.is_completed = is_completed
         if due_date is not None:
@@ -99,12 +114,12 @@ class Note:
     
     def add_attachment(self, file_path: str):
         if file_path not in self.attachments:
-            self.attachments.append(file_path)
+            self.attachments = self.attachments + (file_path,)
             self.updated_at = datetime.now()
     
     def remove_attachment(self, file_path: str):
         if file_path in self.attachments:
-            self.attachments.remove(file_path)
+            self.attachments = tuple(path for path in self.attachments if path != file_path)
             self.updated_at = datetime.now()
     
     def toggle_completed(self):
@@ -0,0 +1,194 @@
+"""
+Model: NoteColumns
+Lưu các trường hay dùng để lọc theo cột (array) song song với các đối tượng Note
+"""
+
+import threading
+from array import array
+from datetime import date, datetime, time, timedelta
+from itertools import compress
+from typing import Dict, Iterable, List, Optional
+
+from models.Note import Note
+from models.NoteQueryEngine import _due_ordinal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, không có thì dùng array + itertools
+    np = None
+
+# Giá trị cho ngày trống (created_at/due_date None) và cho dòng đã xóa
+MISSING = -(2 ** 63)
+NO_CODE = -1
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def epoch_seconds(value) -> int:
+    return int(value.timestamp()) if isinstance(value, datetime) else MISSING
+
+
+def epoch_day(value: Optional[date]) -> int:
+    return value.toordinal() - _EPOCH_ORDINAL if value else MISSING
+
+
+def day_start(value: date) -> int:
+    """Epoch (giờ máy) của 00:00 ngày value, khớp với created_at.timestamp()"""
+    return int(datetime.combine(value, time.min).timestamp())
+
+
+class NoteColumns:
+    """
+    Mỗi ghi chú là một dòng trong các cột note_id, is_completed, priority,
+    category, created_at (epoch giây) và due_date (epoch ngày). priority và
+    category lưu mã số nguyên; bảng mã nằm ngay trong lớp nên không phụ thuộc
+    id trong DB và đổi tên danh mục không làm lệch mã.
+    
+    Xóa chỉ đánh dấu dòng (mã NO_CODE, ngày MISSING) nên thứ tự dòng luôn khớp
+    thứ tự của NoteRepository._notes_by_id; các dòng chết được dồn lại khi
+    chiếm quá nửa. Các hàm lọc trả về danh sách note_id theo thứ tự đó.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self.note_ids = array('q')
+        self.completed = array('b')
+        self.priority = array('i')
+        self.category = array('i')
+        self.created_at = array('q')
+        self.due_date = array('q')
+        # note_id -> vị trí dòng
+        self._rows: Dict[int, int] = {}
+        self._dead = 0
+        self._priority_codes: Dict[Optional[str], int] = {}
+        self._priority_names: List[Optional[str]] = []
+        self._category_codes: Dict[Optional[str], int] = {}
+        self._category_names: List[Optional[str]] = []
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    @staticmethod
+    def _code(codes: Dict[Optional[str], int], names: List[Optional[str]], name: Optional[str]) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+    
+    def _values(self, note: Note) -> tuple:
+        due = _due_ordinal(note.due_date)
+        return (
+            1 if note.is_completed else 0,
+            self._code(self._priority_codes, self._priority_names, note.priority),
+            self._code(self._category_codes, self._category_names, note.category),
+            epoch_seconds(note.created_at),
+            due - _EPOCH_ORDINAL if due is not None else MISSING,
+        )
+    
+    def _append(self, note_id: int, values: tuple):
+        self._rows[note_id] = len(self.note_ids)
+        self.note_ids.append(note_id)
+        self.completed.append(values[0])
+        self.priority.append(values[1])
+        self.category.append(values[2])
+        self.created_at.append(values[3])
+        self.due_date.append(values[4])
+    
+    def _set(self, row: int, values: tuple):
+        self.completed[row] = values[0]
+        self.priority[row] = values[1]
+        self.category[row] = values[2]
+        self.created_at[row] = values[3]
+        self.due_date[row] = values[4]
+    
+    # ==================== Đồng bộ với danh sách ghi chú ====================
+    
+    def rebuild(self, notes: Iterable[Note]):
+        with self._lock:
+            self._reset()
+            for note in notes:
+                self._append(note.note_id, self._values(note))
+    
+    def upsert(self, note: Note):
+        with self._lock:
+            values = self._values(note)
+            row = self._rows.get(note.note_id)
+            if row is None:
+                self._append(note.note_id, values)
+            else:
+                self._set(row, values)
+    
+    def remove(self, note_id: int):
+        with self._lock:
+            row = self._rows.pop(note_id, None)
+            if row is None:
+                return
+            self._set(row, (0, NO_CODE, NO_CODE, MISSING, MISSING))
+            self._dead += 1
+            if self._dead > len(self._rows):
+                self._compact()
+    
+    def _compact(self):
+        live = sorted(self._rows.values())
+        for name in ('note_ids', 'completed', 'priority', 'category', 'created_at', 'due_date'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in live)))
+        self._rows = {note_id: row for row, note_id in enumerate(self.note_ids)}
+        self._dead = 0
+    
+    # ==================== Lọc theo mặt nạ ====================
+    
+    def _select(self, mask) -> List[int]:
+        """note_id của các dòng có mask khác 0 (mask là mảng NumPy hoặc iterable)"""
+        if np is not None:
+            return np.frombuffer(self.note_ids, dtype=np.int64)[mask].tolist()
+        return list(compress(self.note_ids, mask))
+    
+    def _equals(self, column: array, value: int) -> List[int]:
+        if np is not None:
+            return self._select(np.frombuffer(column, dtype=np.int32) == value)
+        return self._select(v == value for v in column)
+    
+    def _between(self, column: array, low: Optional[int], high: Optional[int]) -> List[int]:
+        # Khoảng [low, high); MISSING luôn bị loại
+        low = MISSING + 1 if low is None else low
+        if np is not None:
+            values = np.frombuffer(column, dtype=np.int64)
+            mask = values >= low
+            if high is not None:
+                mask &= values < high
+            return self._select(mask)
+        if high is None:
+            return self._select(v >= low for v in column)
+        return self._select(low <= v < high for v in column)
+    
+    def completed_ids(self) -> List[int]:
+        with self._lock:
+            if np is not None:
+                return self._select(np.frombuffer(self.completed, dtype=np.int8) != 0)
+            return self._select(self.completed)
+    
+    def priority_ids(self, priority: str) -> List[int]:
+        with self._lock:
+            code = self._priority_codes.get(priority)
+            return [] if code is None else self._equals(self.priority, code)
+    
+    def category_ids(self, category: str) -> List[int]:
+        with self._lock:
+            code = self._category_codes.get(category)
+            return [] if code is None else self._equals(self.category, code)
+    
+    def created_between(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[int]:
+        """Ghi chú tạo trong [start_date, end_date] (tính cả hai đầu, theo ngày)"""
+        low = day_start(start_date) if start_date else None
+        high = day_start(end_date + timedelta(days=1)) if end_date else None
+        with self._lock:
+            return self._between(self.created_at, low, high)
+    
+    def due_on(self, target_date: date) -> List[int]:
+        day = epoch_day(target_date)
+        with self._lock:
+            return self._between(self.due_date, day, day + 1)
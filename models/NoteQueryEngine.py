@@ -0,0 +1,135 @@
+"""
+Model: NoteQueryEngine
+Lọc và sắp xếp ghi chú ngay trong bộ nhớ, không cần query lại MySQL
+"""
+
+import unicodedata
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from models.Note import Note
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constants import FilterType, Priority
+
+
+PRIORITY_LEVELS = {Priority.LOW: 1, Priority.MEDIUM: 2, Priority.HIGH: 3}
+
+# Các trường của Note quyết định vị trí trong từng thứ tự của sort_key (ngoài note_id)
+SORT_FIELDS = {
+    "title": {"title"},
+    "priority": {"priority"},
+    "updated_at": {"updated_at"},
+    "due_date": {"due_date"},
+    "created_at": {"is_completed", "created_at"},
+}
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+def _due_ordinal(due_date: Optional[str]) -> Optional[int]:
+    if not due_date:
+        return None
+    try:
+        return datetime.strptime(due_date, '%Y-%m-%d').toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _title_key(title: str) -> str:
+    """
+    Gần với utf8mb4_unicode_ci (so ở mức primary): bỏ hoa/thường và dấu như
+    SearchIndex, nhưng "đ" là chữ riêng xếp ngay sau "d" chứ không gộp với "d".
+    Dấu câu/ký hiệu vẫn có thể xếp khác MySQL.
+    """
+    text = unicodedata.normalize('NFD', (title or '').casefold().replace('đ', 'd\U0010ffff'))
+    return ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+
+
+def sort_key(sort_by: str, reverse: bool) -> Tuple[Callable[[Note], tuple], bool]:
+    """
+    Trả về (key, reverse) cho sorted(), khớp với ORDER BY của NoteRepository.sort_notes
+    (riêng title chỉ gần khớp với collation của MySQL, xem _title_key).
+    note_id luôn là khóa phụ (cùng chiều với khóa chính) để thứ tự ổn định.
+    """
+    sign = -1 if reverse else 1
+    
+    if sort_by == "title":
+        return (lambda n: (_title_key(n.title), n.note_id or 0)), reverse
+    if sort_by == "priority":
+        # Mặc định ưu tiên cao lên đầu (priority_level DESC)
+        return (lambda n: (-sign * PRIORITY_LEVELS.get(n.priority, 0), -sign * (n.note_id or 0))), False
+    if sort_by == "updated_at":
+        return (lambda n: (sign * _timestamp(n.updated_at), sign * (n.note_id or 0))), False
+    if sort_by == "due_date":
+        def due_key(n: Note):
+            due = _due_ordinal(n.due_date)
+            # Ghi chú không có hạn luôn nằm cuối
+            return (due is None, sign * (due or 0), sign * (n.note_id or 0))
+        return due_key, False
+    # created_at: ghi chú chưa hoàn thành luôn lên trước
+    return (lambda n: (n.is_completed, sign * _timestamp(n.created_at), sign * (n.note_id or 0))), False
+
+
+def matches_filter(note: Note, filter_type: Optional[str], category: Optional[str]) -> bool:
+    if filter_type == "important" and note.priority != Priority.HIGH:
+        return False
+    if filter_type == "completed" and not note.is_completed:
+        return False
+    if category and category != FilterType.ALL and note.category != category:
+        return False
+    return True
+
+
+class NoteQueryEngine:
+    """Giữ các view đã sắp xếp sẵn, tự làm mới khi repository có thay đổi"""
+    
+    def __init__(self, repository):
+        self.repository = repository
+        self._version = None
+        self._sorted_views: Dict[Tuple[str, bool], List[Note]] = {}
+        self._results: Dict[tuple, List[Note]] = {}
+    
+    def _sync(self):
+        version = self.repository.data_version
+        if version != self._version:
+            self._sorted_views.clear()
+            self._results.clear()
+            self._version = version
+    
+    def sorted_view(self, sort_by: str, reverse: bool) -> List[Note]:
+        self._sync()
+        view = self._sorted_views.get((sort_by, reverse))
+        if view is None:
+            key, reverse_flag = sort_key(sort_by, reverse)
+            view = sorted(self.repository.get_all_notes(), key=key, reverse=reverse_flag)
+            self._sorted_views[(sort_by, reverse)] = view
+        return view
+    
+    def query(
+        self,
+        sort_by: str = "created_at",
+        reverse: bool = False,
+        filter_type: str = None,
+        category: str = None
+    ) -> List[Note]:
+        self._sync()
+        cache_key = (sort_by, reverse, filter_type, category)
+        result = self._results.get(cache_key)
+        if result is None:
+            view = self.sorted_view(sort_by, reverse)
+            if filter_type or (category and category != FilterType.ALL):
+                result = [n for n in view if matches_filter(n, filter_type, category)]
+            else:
+                result = view
+            self._results[cache_key] = result
+        return list(result)
+    
+    def sort(self, notes: List[Note], sort_by: str, reverse: bool) -> List[Note]:
+        """Sắp xếp một tập ghi chú bất kỳ (ví dụ kết quả tìm kiếm) theo cùng quy tắc"""
+        key, reverse_flag = sort_key(sort_by, reverse)
+        return sorted(notes, key=key, reverse=reverse_flag)
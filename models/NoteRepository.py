@@ -4,35 +4,160 @@ Quản lý lưu trữ và truy xuất dữ liệu ghi chú (MySQL)
 """
 
 import mysql.connector
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime, date
 from models.Note import Note
+from models.ConnectionPool import ConnectionPool
+from models.NoteColumns import NoteColumns
+from models.NoteQueryEngine import NoteQueryEngine
+from models.NoteStatistics import NoteStatistics
+from models.SearchIndex import SearchIndex, tokenize
+from models.WriteBehindQueue import WriteBehindQueue
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constants import WriteMode
 
 
 class NoteRepository:
     """Lớp quản lý lưu trữ ghi chú vào MySQL"""
     
     def __init__(self, host: str = "localhost", user: str = "root", 
-                 password: str = "", database: str = "todo_app_mvc"):
+                 password: str = "", database: str = "todo_app_mvc",
+                 pool_size: int = 5, search_fold_diacritics: bool = True,
+                 write_mode: str = WriteMode.DEFAULT,
+                 flush_interval: float = WriteMode.FLUSH_INTERVAL,
+                 max_pending: int = WriteMode.MAX_PENDING,
+                 auto_load: bool = True, columnar: bool = True):
         
         self.host = host
         self.user = user
         self.password = password
         self.database = database
-        self.notes: List[Note] = []
-        self._create_database()
-        self._create_table()
-        self.load_notes()
-    
-    def _get_connection(self):
-        return mysql.connector.connect(
+        # Index note_id -> Note, giữ đúng thứ tự hiển thị hiện tại (dict giữ thứ tự chèn)
+        self._notes_by_id: Dict[int, Note] = {}
+        # Tăng mỗi khi dữ liệu trong bộ nhớ thay đổi, dùng để làm mới cache truy vấn
+        self._version = 0
+        # True khi dữ liệu trong DB đã đổi mà bộ nhớ chưa phản ánh (đổi/xóa danh mục)
+        self._stale = False
+        # True khi _notes_by_id chứa mọi ghi chú (False ở chế độ phân trang)
+        self._fully_loaded = False
+        self._query_engine = NoteQueryEngine(self)
+        self._search_index = SearchIndex(fold_diacritics=search_fold_diacritics)
+        # Bản lưu theo cột của _notes_by_id để lọc/đếm hàng loạt (None nếu tắt)
+        self._columns: Optional[NoteColumns] = NoteColumns() if columnar else None
+        # Bộ đếm thống kê của _notes_by_id, cập nhật theo từng thay đổi
+        self._statistics = NoteStatistics()
+        # (note_id, file_path) -> tên file gốc; blob đặt tên theo sha256 nên cần tên hiển thị riêng
+        self._attachment_names: Dict[Tuple[int, str], str] = {}
+        # Bảng tra tên <-> id của categories/priorities (bảng nhỏ, hiếm khi đổi)
+        self._category_ids: Dict[str, int] = {}
+        self._category_names: Dict[int, str] = {}
+        self._priority_ids: Dict[str, int] = {}
+        self._priority_names: Dict[int, str] = {}
+        # Tên đã tra mà DB không có, để không nạp lại bảng tra ở mỗi dòng mang tên đó
+        self._missing_categories: Set[Optional[str]] = set()
+        self._missing_priorities: Set[Optional[str]] = set()
+        # innodb_ft_min_token_size của server, đọc ở lần tìm FULLTEXT đầu tiên
+        self._ft_min_token: Optional[int] = None
+        # Pool chỉ mở kết nối khi được mượn lần đầu, tức là sau initialize()
+        self._pool = ConnectionPool(
+            pool_size=pool_size,
             host=self.host,
             user=self.user,
             password=self.password,
             database=self.database,
             charset='utf8mb4'
         )
+        # WRITE_BEHIND: update_note chỉ sửa bộ nhớ, thread nền ghi theo lô
+        self._write_queue: Optional[WriteBehindQueue] = None
+        if write_mode == WriteMode.WRITE_BEHIND:
+            self._write_queue = WriteBehindQueue(self._flush_notes, flush_interval, max_pending)
+        # auto_load=False: giao diện tự gọi initialize() ở thread nền sau khi hiện cửa sổ
+        if auto_load:
+            self.initialize()
+    
+    def initialize(self, load: bool = True):
+        """Tạo database/bảng nếu cần, nạp bảng tra và (nếu load) toàn bộ ghi chú"""
+        self._create_database()
+        self._create_table()
+        # Kết nối của _create_table được trả về pool và dùng lại ở đây
+        if load:
+            self.load_notes()
+    
+    @property
+    def notes(self) -> List[Note]:
+        return list(self._notes_by_id.values())
+    
+    @notes.setter
+    def notes(self, notes: List[Note]):
+        self._notes_by_id = {note.note_id: note for note in notes}
+        self._notes_reset()
+    
+    # ==================== Đồng bộ cấu trúc dữ liệu phụ ====================
+    
+    def _notes_reset(self):
+        self._version += 1
+        self._search_index.rebuild(self._notes_by_id.values())
+        self._statistics.rebuild(self._notes_by_id.values())
+        if self._columns is not None:
+            self._columns.rebuild(self._notes_by_id.values())
+    
+    def _note_added(self, note: Note):
+        self._version += 1
+        self._search_index.add(note)
+        self._statistics.upsert(note)
+        if self._columns is not None:
+            self._columns.upsert(note)
+    
+    def _note_changed(self, note: Note):
+        self._version += 1
+        self._search_index.update(note)
+        self._statistics.upsert(note)
+        if self._columns is not None:
+            self._columns.upsert(note)
+    
+    def _note_removed(self, note: Note):
+        self._version += 1
+        self._search_index.remove(note.note_id)
+        self._statistics.remove(note.note_id)
+        if self._columns is not None:
+            self._columns.remove(note.note_id)
+    
+    @property
+    def data_version(self) -> int:
+        return self._version
+    
+    def invalidate_cache(self):
+        """Đánh dấu cần tải lại từ DB ở lần truy vấn tiếp theo"""
+        self._stale = True
+        if not self._fully_loaded:
+            # Phân trang: các trang đã tải chỉ là cache, bỏ đi để trang mới đọc lại từ DB
+            self.notes = []
+    
+    def _get_connection(self):
+        """Mượn kết nối từ pool, conn.close() sẽ trả kết nối về pool"""
+        return self._pool.get_connection()
+    
+    def get_pool_stats(self) -> dict:
+        return self._pool.get_stats()
+    
+    def flush(self) -> bool:
+        """Ghi ngay các thay đổi đang chờ ở chế độ write-behind"""
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush()
+    
+    def get_write_stats(self) -> dict:
+        return self._write_queue.get_stats() if self._write_queue else {}
+    
+    def close(self) -> bool:
+        """Flush phần còn chờ rồi đóng pool; False nếu có thay đổi chưa ghi được"""
+        flushed = self._write_queue.close() if self._write_queue else True
+        self._pool.close_all()
+        return flushed
     
     def _create_database(self):
         try:
@@ -89,7 +214,11 @@ class NoteRepository:
                     FOREIGN KEY (priority_id) REFERENCES priorities(priority_id) ON DELETE SET NULL,
                     INDEX idx_created_at (created_at),
                     INDEX idx_is_completed (is_completed),
-                    INDEX idx_due_date (due_date)
+                    INDEX idx_due_date (due_date),
+                    INDEX idx_completed_created (is_completed, created_at),
+                    INDEX idx_completed_created_desc (is_completed, created_at DESC, note_id DESC),
+                    INDEX idx_updated_at (updated_at),
+                    FULLTEXT INDEX ft_title_content (title, content)
                 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
             
@@ -101,12 +230,16 @@ class NoteRepository:
                     file_name VARCHAR(255),
                     file_size BIGINT,
                     file_type VARCHAR(50),
+                    content_hash CHAR(64),
                     uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (note_id) REFERENCES notes(note_id) ON DELETE CASCADE,
-                    INDEX idx_note_id (note_id)
+                    INDEX idx_note_id (note_id),
+                    INDEX idx_content_hash (content_hash)
                 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
             
+            self._migrate_schema(cursor)
+            
             cursor.execute("SELECT COUNT(*) as count FROM categories")
             if cursor.fetchone()['count'] == 0:
                 default_categories = [
@@ -137,54 +270,219 @@ class NoteRepository:
                 )
             
             conn.commit()
+            # Dùng luôn kết nối này thay vì mở thêm một lần nữa
+            self._load_lookups(cursor)
             cursor.close()
             conn.close()
         except Exception as e:
             print(f"Lỗi khi tạo bảng: {e}")
     
-    def load_notes(self) -> List[Note]:
+    def _has_index(self, cursor, table: str, index_name: str) -> bool:
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (self.database, table, index_name))
+        return cursor.fetchone()['count'] > 0
+    
+    def _has_column(self, cursor, table: str, column_name: str) -> bool:
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (self.database, table, column_name))
+        return cursor.fetchone()['count'] > 0
+    
+    def _migrate_schema(self, cursor):
+        """Bổ sung các thay đổi schema cho database đã tạo từ phiên bản cũ"""
+        if not self._has_index(cursor, 'notes', 'ft_title_content'):
+            cursor.execute("ALTER TABLE notes ADD FULLTEXT INDEX ft_title_content (title, content)")
+        if not self._has_index(cursor, 'notes', 'idx_completed_created'):
+            # Phục vụ phân trang keyset theo thứ tự mặc định và theo updated_at
+            cursor.execute("""
+                ALTER TABLE notes
+                ADD INDEX idx_completed_created (is_completed, created_at),
+                ADD INDEX idx_updated_at (updated_at)
+            """)
+        if not self._has_index(cursor, 'notes', 'idx_completed_created_desc'):
+            # Thứ tự mặc định "mới nhất trước" trộn chiều (is_completed ASC, created_at DESC)
+            # nên cần index có phần DESC tương ứng để không phải filesort
+            cursor.execute("""
+                ALTER TABLE notes
+                ADD INDEX idx_completed_created_desc (is_completed, created_at DESC, note_id DESC)
+            """)
+        if not self._has_column(cursor, 'attachments', 'content_hash'):
+            cursor.execute("""
+                ALTER TABLE attachments
+                ADD COLUMN content_hash CHAR(64) AFTER file_type,
+                ADD INDEX idx_content_hash (content_hash)
+            """)
+    
+    # ==================== Bảng tra categories/priorities ====================
+    
+    def _load_lookups(self, cursor, forget_missing: bool = True):
+        """Nạp lại bảng tra bằng cursor dictionary sẵn có"""
+        cursor.execute("SELECT category_id, category_name FROM categories ORDER BY category_id")
+        category_ids = {row['category_name']: row['category_id'] for row in cursor.fetchall()}
+        cursor.execute("SELECT priority_id, priority_name FROM priorities ORDER BY priority_id")
+        priority_ids = {row['priority_name']: row['priority_id'] for row in cursor.fetchall()}
+        
+        # Dựng xong mới gán để thread khác không thấy bảng dở dang
+        self._category_ids = category_ids
+        self._category_names = {v: k for k, v in category_ids.items()}
+        self._priority_ids = priority_ids
+        self._priority_names = {v: k for k, v in priority_ids.items()}
+        if forget_missing:
+            self._missing_categories = set()
+            self._missing_priorities = set()
+    
+    def _refresh_lookups(self):
         try:
             conn = self._get_connection()
             cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT 
-                    n.*,
-                    c.category_name as category,
-                    p.priority_name as priority
+            self._load_lookups(cursor)
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            print(f"Lỗi khi tải danh mục/mức ưu tiên: {e}")
+    
+    def _lookup_ids(self, cursor, category: str, priority: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        (category_id, priority_id) từ bảng tra; chỉ hỏi lại DB khi gặp tên lạ lần
+        đầu, tên DB vẫn không có thì được nhớ lại tới lần nạp bảng tra kế tiếp
+        """
+        if ((category not in self._category_ids and category not in self._missing_categories)
+                or (priority not in self._priority_ids and priority not in self._missing_priorities)):
+            # Có thể client khác vừa thêm danh mục
+            self._load_lookups(cursor, forget_missing=False)
+            if category not in self._category_ids:
+                self._missing_categories.add(category)
+            if priority not in self._priority_ids:
+                self._missing_priorities.add(priority)
+        return self._category_ids.get(category), self._priority_ids.get(priority)
+    
+    def _resolve_lookups(self, cursor, rows: Iterable[dict]):
+        """
+        Nạp lại bảng tra (một lần) nếu có dòng mang category_id/priority_id chưa
+        biết, ví dụ danh mục do client khác vừa thêm. Nếu không, _row_to_note sẽ
+        đổi nó thành tên mặc định và lần ghi sau ghi đè id thật.
+        """
+        for row in rows:
+            category_id, priority_id = row['category_id'], row['priority_id']
+            if ((category_id is not None and category_id not in self._category_names)
+                    or (priority_id is not None and priority_id not in self._priority_names)):
+                self._load_lookups(cursor)
+                return
+    
+    def _row_to_note(self, row: dict, attachments: List[str]) -> Note:
+        return Note(
+            note_id=row['note_id'],
+            title=row['title'],
+            content=row['content'] or '',
+            category=self._category_names.get(row['category_id']) or 'Cá nhân',
+            priority=self._priority_names.get(row['priority_id']) or 'Thấp',
+            is_completed=bool(row['is_completed']),
+            due_date=row['due_date'].strftime('%Y-%m-%d') if row['due_date'] else None,
+            attachments=attachments,
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
+        )
+    
+    def _fetch_attachments(self, cursor, where_clause: str = "", params: tuple = ()) -> Dict[int, List[str]]:
+        """Lấy đính kèm của mọi note khớp where_clause (chỉ dùng cột của n) bằng một query duy nhất"""
+        cursor.execute(f"""
+            SELECT a.note_id, a.file_path, a.file_name
+            FROM attachments a
+            JOIN notes n ON a.note_id = n.note_id
+            {where_clause}
+            ORDER BY a.uploaded_at DESC
+        """, params)
+        
+        attachments: Dict[int, List[str]] = {}
+        for att in cursor.fetchall():
+            attachments.setdefault(att['note_id'], []).append(att['file_path'])
+            if att['file_name']:
+                self._attachment_names[(att['note_id'], att['file_path'])] = att['file_name']
+        return attachments
+    
+    def iter_notes(self, where_clause: str = "", params: tuple = (),
+                   order_clause: str = "n.is_completed ASC, n.created_at DESC, n.note_id DESC",
+                   joins: str = "", batch_size: int = 1000) -> Iterator[Note]:
+        """
+        Sinh lần lượt từng Note với bộ nhớ giới hạn: cursor không buffer (server
+        trả dần), fetchmany từng batch_size dòng dạng tuple, đính kèm của mỗi
+        batch lấy qua một kết nối thứ hai. where/order chỉ dùng cột của n,
+        joins khi cần bảng khác. Dừng giữa chừng thì kết nối bị bỏ khỏi pool vì
+        còn kết quả chưa đọc.
+        """
+        self.flush()
+        conn = self._get_connection()
+        att_conn = None
+        exhausted = False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT n.*
                 FROM notes n
-                LEFT JOIN categories c ON n.category_id = c.category_id
-                LEFT JOIN priorities p ON n.priority_id = p.priority_id
-                ORDER BY n.is_completed ASC, n.created_at DESC
-            """)
-            rows = cursor.fetchall()
-            
-            self.notes = []
-            for row in rows:
-                cursor.execute("""
-                    SELECT file_path 
-                    FROM attachments 
-                    WHERE note_id = %s
-                    ORDER BY uploaded_at DESC
-                """, (row['note_id'],))
-                attachments = [att['file_path'] for att in cursor.fetchall()]
-                
-                note = Note(
-                    note_id=row['note_id'],
-                    title=row['title'],
-                    content=row['content'] or '',
-                    category=row['category'] or 'Cá nhân',
-                    priority=row['priority'] or 'Thấp',
-                    is_completed=bool(row['is_completed']),
-                    due_date=row['due_date'].strftime('%Y-%m-%d') if row['due_date'] else None,
-                    attachments=attachments,
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
-                self.notes.append(note)
+                {joins}
+                {where_clause}
+                ORDER BY {order_clause}
+            """, params)
+            columns = cursor.column_names
+            id_index = columns.index('note_id')
             
+            # Kết nối đang stream không chạy được query khác
+            att_conn = self._get_connection()
+            att_cursor = att_conn.cursor(dictionary=True)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                note_ids = tuple(row[id_index] for row in rows)
+                placeholders = ', '.join(['%s'] * len(note_ids))
+                attachments = self._fetch_attachments(att_cursor, f"WHERE n.note_id IN ({placeholders})", note_ids)
+                rows = [dict(zip(columns, row)) for row in rows]
+                self._resolve_lookups(att_cursor, rows)
+                for row in rows:
+                    yield self._row_to_note(row, attachments.get(row['note_id'], []))
             cursor.close()
-            conn.close()
+            att_cursor.close()
+        finally:
+            if att_conn is not None:
+                att_conn.close()
+            if exhausted:
+                conn.close()
+            else:
+                conn.invalidate()
+    
+    def load_notes(self, on_batch: Optional[Callable[[List[Note]], None]] = None,
+                   batch_size: int = 1000) -> List[Note]:
+        """
+        Nạp toàn bộ ghi chú theo thứ tự mặc định. on_batch (nếu có) nhận từng lô
+        batch_size ghi chú ngay khi đọc xong để giao diện hiển thị dần; index
+        chỉ được thay khi đã đọc hết nên người gọi không được sửa ghi chú trong
+        lúc đang nạp (thay đổi vào index cũ sẽ bị mất).
+        """
+        # Ghi các thay đổi đang chờ trước để không bị dữ liệu cũ trong DB ghi đè
+        self.flush()
+        try:
+            # Dựng thẳng index từ generator, không giữ danh sách dòng thô song song
+            notes_by_id: Dict[int, Note] = {}
+            batch: List[Note] = []
+            for note in self.iter_notes(batch_size=batch_size):
+                notes_by_id[note.note_id] = note
+                if on_batch is not None:
+                    batch.append(note)
+                    if len(batch) >= batch_size:
+                        on_batch(batch)
+                        batch = []
+            if batch:
+                on_batch(batch)
+            self._notes_by_id = notes_by_id
+            self._notes_reset()
+            self._stale = False
+            self._fully_loaded = True
             return self.notes
         except Exception as e:
             print(f"Lỗi khi tải dữ liệu: {e}")
@@ -196,13 +494,7 @@ class NoteRepository:
             conn = self._get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            cursor.execute("SELECT category_id FROM categories WHERE category_name = %s", (note.category,))
-            category_row = cursor.fetchone()
-            category_id = category_row['category_id'] if category_row else None
-            
-            cursor.execute("SELECT priority_id FROM priorities WHERE priority_name = %s", (note.priority,))
-            priority_row = cursor.fetchone()
-            priority_id = priority_row['priority_id'] if priority_row else None
+            category_id, priority_id = self._lookup_ids(cursor, note.category, note.priority)
             
             cursor.execute("""
                 INSERT INTO notes 
@@ -223,92 +515,328 @@ class NoteRepository:
             note_id = cursor.lastrowid
             note.note_id = note_id
             
-            if note.attachments:
-                for file_path in note.attachments:
-                    import os
-                    file_name = os.path.basename(file_path)
-                    file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                    file_type = os.path.splitext(file_path)[1]
-                    
-                    cursor.execute("""
-                        INSERT INTO attachments (note_id, file_path, file_name, file_size, file_type)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (note_id, file_path, file_name, file_size, file_type))
+            for file_path in note.attachments:
+                self._insert_attachment(cursor, note_id, file_path)
             
             conn.commit()
             cursor.close()
             conn.close()
             
-            self.notes.append(note)
+            self._notes_by_id[note.note_id] = note
+            self._note_added(note)
             return True
         except Exception as e:
             print(f"Lỗi khi thêm ghi chú: {e}")
             return False
     
+    _INSERT_NOTE_SQL = """
+        INSERT INTO notes 
+        (title, content, category_id, priority_id, is_completed, 
+         due_date, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    def add_notes_bulk(self, notes: Iterable[Note], chunk_size: int = 1000,
+                       prepare_attachment: Optional[Callable[[str], tuple]] = None,
+                       release_attachment: Optional[Callable[[str], None]] = None) -> int:
+        """
+        Thêm nhiều ghi chú, mỗi khối chunk_size ghi chú là một transaction; khối
+        lỗi bị rollback. prepare_attachment(path) -> (file_path, file_size,
+        file_name, content_hash) đưa file đính kèm vào kho trước khi ghi dòng
+        attachments; mặc định lưu nguyên đường dẫn. Khối bị rollback gọi
+        release_attachment(file_path) cho các file đã chuẩn bị. Ghi chú chỉ được giữ trong
+        bộ nhớ khi repository đã nạp đủ (không phải lệnh import của CLI).
+        Trả về số ghi chú đã thêm.
+        """
+        added = 0
+        keep = self._fully_loaded
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            for chunk in self._chunks(notes, chunk_size):
+                prepared = [(note, self._prepare_attachments(note, prepare_attachment)) for note in chunk]
+                try:
+                    # Không dựa vào id liên tiếp của INSERT nhiều dòng (innodb_autoinc_lock_mode=2
+                    # không bảo đảm): ghi chú cần id thì chèn từng dòng để đọc lastrowid
+                    batch = [note for note, atts in prepared if not keep and not atts]
+                    if batch:
+                        cursor.executemany(
+                            self._INSERT_NOTE_SQL,
+                            [self._insert_params(cursor, note) for note in batch]
+                        )
+                    attachment_rows = []
+                    for note, atts in prepared:
+                        if not keep and not atts:
+                            continue
+                        cursor.execute(self._INSERT_NOTE_SQL, self._insert_params(cursor, note))
+                        note.note_id = cursor.lastrowid
+                        attachment_rows.extend(
+                            (note.note_id, path, name, size, os.path.splitext(name)[1], digest)
+                            for path, size, name, digest in atts
+                        )
+                    if attachment_rows:
+                        cursor.executemany("""
+                            INSERT INTO attachments (note_id, file_path, file_name, file_size, file_type, content_hash)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        """, attachment_rows)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    for note in chunk:
+                        note.note_id = None
+                    print(f"Lỗi khi thêm khối {len(chunk)} ghi chú: {e}")
+                    if release_attachment is not None:
+                        # Không còn dòng nào trỏ tới file vừa đưa vào kho cho khối này
+                        for path in {path for _, atts in prepared for path, _, _, _ in atts}:
+                            release_attachment(path)
+                    continue
+                
+                if keep:
+                    for note, atts in prepared:
+                        self._notes_by_id[note.note_id] = note
+                        for path, _, name, _ in atts:
+                            self._attachment_names[(note.note_id, path)] = name
+                added += len(chunk)
+            cursor.close()
+        finally:
+            conn.close()
+            if added and keep:
+                # Dựng lại chỉ mục một lần thay vì cập nhật từng ghi chú
+                self._notes_reset()
+        return added
+    
+    def _insert_params(self, cursor, note: Note) -> tuple:
+        category_id, priority_id = self._lookup_ids(cursor, note.category, note.priority)
+        return (
+            note.title,
+            note.content,
+            category_id,
+            priority_id,
+            note.is_completed,
+            note.due_date,
+            note.created_at,
+            note.updated_at
+        )
+    
+    @staticmethod
+    def _prepare_attachments(note: Note, prepare: Optional[Callable[[str], tuple]]) -> List[tuple]:
+        """(file_path, file_size, file_name, content_hash) của từng đính kèm; đổi note.attachments theo"""
+        prepared = []
+        for path in note.attachments:
+            try:
+                if prepare is not None:
+                    prepared.append(prepare(path))
+                else:
+                    size = os.path.getsize(path) if os.path.exists(path) else 0
+                    prepared.append((path, size, os.path.basename(path), None))
+            except Exception as e:
+                print(f"Bỏ qua đính kèm {path}: {e}")
+        note.attachments = tuple(path for path, _, _, _ in prepared)
+        return prepared
+    
+    @staticmethod
+    def _chunks(items: Iterable, size: int) -> Iterator[list]:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
     def update_note(self, note_id: str, **kwargs) -> bool:
         note = self.get_note_by_id(note_id)
         if not note:
             return False
         
+        # Đính kèm chỉ ghi phần chênh lệch, không xóa rồi chèn lại toàn bộ
+        attachments = kwargs.pop('attachments', None)
+        
         try:
+            old_attachments = list(note.attachments)
             note.update(**kwargs)
+            if attachments is not None:
+                note.attachments = tuple(attachments)
+            self._note_changed(note)
+            
+            if self._write_queue is not None and attachments is None:
+                self._write_queue.mark_dirty(note.note_id)
+                return True
             
             conn = self._get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            cursor.execute("SELECT category_id FROM categories WHERE category_name = %s", (note.category,))
-            category_row = cursor.fetchone()
-            category_id = category_row['category_id'] if category_row else None
+            category_id, priority_id = self._lookup_ids(cursor, note.category, note.priority)
+            cursor.execute(self._UPDATE_NOTE_SQL, self._update_params(note, category_id, priority_id))
             
-            cursor.execute("SELECT priority_id FROM priorities WHERE priority_name = %s", (note.priority,))
-            priority_row = cursor.fetchone()
-            priority_id = priority_row['priority_id'] if priority_row else None
+            if attachments is not None:
+                kept = set(note.attachments)
+                for file_path in old_attachments:
+                    if file_path not in kept:
+                        self._delete_attachment(cursor, note_id, file_path)
+                existing = set(old_attachments)
+                for file_path in note.attachments:
+                    if file_path not in existing:
+                        self._insert_attachment(cursor, note_id, file_path)
             
-            cursor.execute("""
-                UPDATE notes 
-                SET title=%s, content=%s, category_id=%s, priority_id=%s,
-                    is_completed=%s, due_date=%s,
-                    updated_at=%s
-                WHERE note_id=%s
-            """, (
-                note.title,
-                note.content,
-                category_id,
-                priority_id,
-                note.is_completed,
-                note.due_date,
-                note.updated_at,
-                note_id
-            ))
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Lỗi khi cập nhật ghi chú: {e}")
+            return False
+    
+    _UPDATE_NOTE_SQL = """
+        UPDATE notes 
+        SET title=%s, content=%s, category_id=%s, priority_id=%s,
+            is_completed=%s, due_date=%s,
+            updated_at=%s
+        WHERE note_id=%s
+    """
+    
+    @staticmethod
+    def _update_params(note: Note, category_id, priority_id) -> tuple:
+        return (
+            note.title,
+            note.content,
+            category_id,
+            priority_id,
+            note.is_completed,
+            note.due_date,
+            note.updated_at,
+            note.note_id
+        )
+    
+    def _flush_notes(self, note_ids: List[int]):
+        """Ghi trạng thái hiện tại của các ghi chú bẩn trong một transaction (thread nền)"""
+        notes = [note for note in (self._notes_by_id.get(i) for i in note_ids) if note is not None]
+        if not notes:
+            return
+        
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            params = []
+            for note in notes:
+                category_id, priority_id = self._lookup_ids(cursor, note.category, note.priority)
+                params.append(self._update_params(note, category_id, priority_id))
             
-            if 'attachments' in kwargs:
-                cursor.execute("DELETE FROM attachments WHERE note_id = %s", (note_id,))
-                
-                if note.attachments:
-                    import os
-                    for file_path in note.attachments:
-                        file_name = os.path.basename(file_path)
-                        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                        file_type = os.path.splitext(file_path)[1]
-                        
-                        cursor.execute("""
-                            INSERT INTO attachments (note_id, file_path, file_name, file_size, file_type)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (note_id, file_path, file_name, file_size, file_type))
+            cursor.executemany(self._UPDATE_NOTE_SQL, params)
+            conn.commit()
+            cursor.close()
+        finally:
+            # Lỗi giữa chừng: pool rollback khi nhận lại kết nối
+            conn.close()
+    
+    # ==================== Đính kèm ====================
+    
+    def _insert_attachment(self, cursor, note_id, file_path: str, file_size: Optional[int] = None,
+                           file_name: Optional[str] = None, content_hash: Optional[str] = None):
+        if file_size is None:
+            file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        file_name = file_name or os.path.basename(file_path)
+        cursor.execute("""
+            INSERT INTO attachments (note_id, file_path, file_name, file_size, file_type, content_hash)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (note_id, file_path, file_name, file_size, os.path.splitext(file_name)[1], content_hash))
+        self._attachment_names[(note_id, file_path)] = file_name
+    
+    def _delete_attachment(self, cursor, note_id, file_path: str):
+        # file_path là TEXT nên không có index, lọc theo note_id trước
+        cursor.execute(
+            "DELETE FROM attachments WHERE note_id = %s AND file_path = %s",
+            (note_id, file_path)
+        )
+        self._attachment_names.pop((note_id, file_path), None)
+    
+    def add_attachment(self, note_id, file_path: str, file_size: Optional[int] = None,
+                       file_name: Optional[str] = None, content_hash: Optional[str] = None) -> bool:
+        """Chèn đúng một dòng attachments và cập nhật updated_at của ghi chú"""
+        note = self.get_note_by_id(note_id)
+        if not note:
+            return False
+        if file_path in note.attachments:
+            return True
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            self._insert_attachment(cursor, note_id, file_path, file_size, file_name, content_hash)
+            updated_at = datetime.now()
+            cursor.execute("UPDATE notes SET updated_at=%s WHERE note_id=%s", (updated_at, note_id))
+            conn.commit()
+            cursor.close()
+            conn.close()
             
+            note.add_attachment(file_path)
+            note.updated_at = updated_at
+            self._note_changed(note)
+            return True
+        except Exception as e:
+            print(f"Lỗi khi thêm đính kèm: {e}")
+            return False
+    
+    def remove_attachment(self, note_id, file_path: str) -> bool:
+        """Xóa đúng một dòng attachments và cập nhật updated_at của ghi chú"""
+        note = self.get_note_by_id(note_id)
+        if not note:
+            return False
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            self._delete_attachment(cursor, note_id, file_path)
+            updated_at = datetime.now()
+            cursor.execute("UPDATE notes SET updated_at=%s WHERE note_id=%s", (updated_at, note_id))
             conn.commit()
             cursor.close()
             conn.close()
+            
+            note.remove_attachment(file_path)
+            note.updated_at = updated_at
+            self._note_changed(note)
             return True
         except Exception as e:
-            print(f"Lỗi khi cập nhật ghi chú: {e}")
+            print(f"Lỗi khi xóa đính kèm: {e}")
             return False
     
+    def get_attachment_name(self, note_id, file_path: str) -> str:
+        return self._attachment_names.get((note_id, file_path)) or os.path.basename(file_path)
+    
+    def count_attachment_references(self, content_hash: Optional[str], file_path: str) -> int:
+        """
+        Số dòng attachments còn trỏ tới một file. Blob đếm qua index content_hash;
+        file cũ (content_hash NULL) phải quét theo file_path.
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            if content_hash is not None:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM attachments WHERE content_hash = %s AND file_path = %s",
+                    (content_hash, file_path)
+                )
+            else:
+                cursor.execute("SELECT COUNT(*) FROM attachments WHERE file_path = %s", (file_path,))
+            count = cursor.fetchone()[0]
+            cursor.close()
+            conn.close()
+            return count
+        except Exception as e:
+            print(f"Lỗi khi đếm tham chiếu đính kèm: {e}")
+            # Không chắc thì coi như còn dùng để không xóa nhầm
+            return 1
+    
     def delete_note(self, note_id: str) -> bool:
         note = self.get_note_by_id(note_id)
         if not note:
             return False
         
+        if self._write_queue is not None:
+            self._write_queue.discard([note.note_id])
+        
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
@@ -317,35 +845,65 @@ class NoteRepository:
             cursor.close()
             conn.close()
             
-            self.notes.remove(note)
+            self._notes_by_id.pop(note.note_id, None)
+            for file_path in note.attachments:
+                self._attachment_names.pop((note.note_id, file_path), None)
+            self._note_removed(note)
             return True
         except Exception as e:
             print(f"Lỗi khi xóa ghi chú: {e}")
             return False
     
     def get_note_by_id(self, note_id: str) -> Optional[Note]:
-        for note in self.notes:
-            if note.note_id == note_id:
-                return note
-        return None
+        note = self._notes_by_id.get(note_id)
+        if note is None and not self._fully_loaded and note_id is not None:
+            # Chế độ phân trang: ghi chú chưa nằm trong trang nào đã tải
+            note = self._fetch_note(note_id)
+        return note
+    
+    def _fetch_note(self, note_id) -> Optional[Note]:
+        try:
+            # Đọc hết (tối đa một dòng) để kết nối được trả lại pool
+            notes = list(self.iter_notes("WHERE n.note_id = %s", (note_id,)))
+        except Exception as e:
+            print(f"Lỗi khi tải ghi chú {note_id}: {e}")
+            return None
+        if not notes:
+            return None
+        note = notes[0]
+        self._notes_by_id[note.note_id] = note
+        self._note_added(note)
+        return note
     
     def get_all_notes(self) -> List[Note]:
         return self.notes
     
+    def _notes_from_ids(self, note_ids: Iterable[int]) -> List[Note]:
+        notes = self._notes_by_id
+        return [notes[note_id] for note_id in note_ids if note_id in notes]
+    
     def get_by_category(self, category: str) -> List[Note]:
         if category == "Tất cả":
             return self.notes
-        return [note for note in self.notes if note.category == category]
+        if self._columns is not None:
+            return self._notes_from_ids(self._columns.category_ids(category))
+        return [note for note in self._notes_by_id.values() if note.category == category]
     
     def get_important_notes(self) -> List[Note]:
-        return [note for note in self.notes if note.priority == 'Cao']
+        if self._columns is not None:
+            return self._notes_from_ids(self._columns.priority_ids('Cao'))
+        return [note for note in self._notes_by_id.values() if note.priority == 'Cao']
     
     def get_completed_notes(self) -> List[Note]:
-        return [note for note in self.notes if note.is_completed]
+        if self._columns is not None:
+            return self._notes_from_ids(self._columns.completed_ids())
+        return [note for note in self._notes_by_id.values() if note.is_completed]
     
     def get_notes_by_due_date(self, target_date: date) -> List[Note]:
+        if self._columns is not None:
+            return self._notes_from_ids(self._columns.due_on(target_date))
         result = []
-        for note in self.notes:
+        for note in self._notes_by_id.values():
             if note.due_date:
                 try:
                     due = datetime.strptime(note.due_date, '%Y-%m-%d').date()
@@ -356,21 +914,100 @@ class NoteRepository:
         return result
     
     def search_notes(self, keyword: str) -> List[Note]:
-        keyword = keyword.lower()
+        """Tra chỉ mục ngược; kết quả chưa sắp xếp"""
+        note_ids = self._search_index.search(keyword)
         result = []
-        for note in self.notes:
-            if (keyword in note.title.lower() or 
-                keyword in note.content.lower()):
+        for note_id in note_ids:
+            note = self._notes_by_id.get(note_id)
+            if note:
                 result.append(note)
         return result
     
+    def _ft_min_token_size(self, cursor) -> int:
+        if self._ft_min_token is None:
+            try:
+                cursor.execute("SELECT @@innodb_ft_min_token_size AS size")
+                self._ft_min_token = int(cursor.fetchone()['size'])
+            except mysql.connector.Error:
+                self._ft_min_token = 3
+        return self._ft_min_token
+    
+    def search_notes_fulltext(self, keyword: str, limit: int = 50, offset: int = 0) -> List[Tuple[Note, float]]:
+        """
+        Tìm kiếm phía server bằng FULLTEXT index, trả về (note, relevance)
+        theo thứ tự relevance giảm dần, phân trang bằng limit/offset.
+        """
+        # Chỉ giữ ký tự chữ/số nên không lọt toán tử boolean
+        terms = tokenize(keyword, fold_diacritics=False)
+        if not terms:
+            return []
+        self.flush()
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor(dictionary=True)
+            # Parser mặc định không index từ ngắn hơn innodb_ft_min_token_size (mặc
+            # định 3), nên "+đi*" làm cả câu không khớp gì: mỗi từ dài là bắt buộc
+            # và khớp tiền tố, từ ngắn ("đi", "ăn") lọc thêm bằng LIKE
+            min_size = self._ft_min_token_size(cursor)
+            long_terms = [term for term in terms if len(term) >= min_size]
+            relevance, select_params = "0", []
+            conditions, params = [], []
+            if long_terms:
+                boolean_query = ' '.join(f"+{term}*" for term in long_terms)
+                relevance = "MATCH(n.title, n.content) AGAINST (%s IN BOOLEAN MODE)"
+                select_params = [boolean_query]
+                conditions.append(relevance)
+                params.append(boolean_query)
+            for term in terms:
+                if len(term) < min_size:
+                    pattern = '%' + term.replace('_', '\\_') + '%'
+                    conditions.append("(n.title LIKE %s OR n.content LIKE %s)")
+                    params += [pattern, pattern]
+            cursor.execute(f"""
+                SELECT 
+                    n.*,
+                    {relevance} as relevance
+                FROM notes n
+                WHERE {' AND '.join(conditions)}
+                ORDER BY relevance DESC, n.note_id DESC
+                LIMIT %s OFFSET %s
+            """, tuple(select_params + params + [limit, offset]))
+            rows = cursor.fetchall()
+            
+            attachments = {}
+            if rows:
+                note_ids = tuple(row['note_id'] for row in rows)
+                placeholders = ', '.join(['%s'] * len(note_ids))
+                attachments = self._fetch_attachments(cursor, f"WHERE n.note_id IN ({placeholders})", note_ids)
+                self._resolve_lookups(cursor, rows)
+            
+            cursor.close()
+            conn.close()
+            
+            results = []
+            for row in rows:
+                # Ưu tiên đối tượng đã có trong bộ nhớ để giữ nguyên trạng thái đang sửa
+                note = self._notes_by_id.get(row['note_id'])
+                if note is None:
+                    note = self._row_to_note(row, attachments.get(row['note_id'], []))
+                results.append((note, float(row['relevance'])))
+            return results
+        except Exception as e:
+            print(f"Lỗi khi tìm kiếm FULLTEXT: {e}")
+            return []
+    
     def search_notes_by_date_range(
         self, 
         start_date: Optional[date] = None, 
         end_date: Optional[date] = None
     ) -> List[Note]:
+        if self._columns is not None:
+            if not start_date and not end_date:
+                return []
+            return self._notes_from_ids(self._columns.created_between(start_date, end_date))
         result = []
-        for note in self.notes:
+        for note in self._notes_by_id.values():
             note_date = note.created_at.date() if isinstance(note.created_at, datetime) else None
             if note_date:
                 if start_date and end_date:
@@ -384,6 +1021,154 @@ class NoteRepository:
                         result.append(note)
         return result
     
+    # ==================== Phân trang keyset ====================
+    
+    @staticmethod
+    def _keyset_order(sort_by: str, reverse: bool) -> Tuple[List[Tuple[str, bool]], str]:
+        """
+        Các khóa sắp xếp (biểu thức SQL, DESC?) khớp với NoteQueryEngine.sort_key,
+        luôn kết thúc bằng note_id cùng chiều với khóa trước nó để thứ tự là toàn
+        phần. Trả về (khóa, JOIN cần thêm). Giá trị NULL được COALESCE vì không so
+        sánh được trong điều kiện keyset.
+        
+        Chỉ created_at (idx_completed_created / idx_completed_created_desc) và
+        updated_at (idx_updated_at + khóa chính) đọc được thẳng theo index. title
+        (TEXT), priority (priority_level nằm ở bảng priorities) và due_date (biểu
+        thức IS NULL/COALESCE) vẫn phân trang đúng nhưng MySQL phải filesort toàn
+        bộ dòng khớp bộ lọc ở mỗi trang, nên với bảng lớn các trang này chậm như
+        khi không phân trang.
+        """
+        if sort_by == "title":
+            return [("n.title", reverse), ("n.note_id", reverse)], ""
+        if sort_by == "priority":
+            joins = "LEFT JOIN priorities p ON n.priority_id = p.priority_id"
+            return [("COALESCE(p.priority_level, 0)", not reverse), ("n.note_id", not reverse)], joins
+        if sort_by == "updated_at":
+            return [("n.updated_at", reverse), ("n.note_id", reverse)], ""
+        if sort_by == "due_date":
+            return [
+                ("(n.due_date IS NULL)", False),
+                ("COALESCE(n.due_date, DATE '1000-01-01')", reverse),
+                ("n.note_id", reverse)
+            ], ""
+        return [("n.is_completed", False), ("n.created_at", reverse), ("n.note_id", reverse)], ""
+    
+    @staticmethod
+    def _keyset_after(keys: List[Tuple[str, bool]], after: tuple) -> Tuple[str, list]:
+        """Điều kiện "đứng sau bộ giá trị after" theo thứ tự từ điển, mỗi khóa có chiều riêng"""
+        clauses = []
+        params = []
+        for i, (expr, desc) in enumerate(keys):
+            parts = [f"{prev} = %s" for prev, _ in keys[:i]]
+            parts.append(f"{expr} {'<' if desc else '>'} %s")
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params.extend(after[:i + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+    
+    def fetch_notes_page(
+        self,
+        sort_by: str = "created_at",
+        reverse: bool = False,
+        filter_type: str = None,
+        category: str = None,
+        after: Optional[tuple] = None,
+        limit: int = 50
+    ) -> Tuple[List[Note], Optional[tuple]]:
+        """
+        Một trang ghi chú theo keyset: chỉ đọc limit dòng bắt đầu ngay sau con
+        trỏ after (None = trang đầu), không dùng OFFSET nên trang sau cũng rẻ
+        như trang đầu. Trả về (ghi chú, con trỏ trang sau hoặc None nếu hết).
+        """
+        keys, joins = self._keyset_order(sort_by, reverse)
+        where_conditions = []
+        params: list = []
+        if filter_type == "important":
+            where_conditions.append("n.priority_id = %s")
+            params.append(self._priority_ids.get('Cao'))
+        elif filter_type == "completed":
+            where_conditions.append("n.is_completed = TRUE")
+        if category and category != "Tất cả":
+            where_conditions.append("n.category_id = %s")
+            params.append(self._category_ids.get(category))
+        if after is not None:
+            condition, after_params = self._keyset_after(keys, after)
+            where_conditions.append(condition)
+            params.extend(after_params)
+        
+        where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+        select_keys = ", ".join(f"{expr} AS k{i}" for i, (expr, _) in enumerate(keys))
+        order_clause = ", ".join(f"{expr} {'DESC' if desc else 'ASC'}" for expr, desc in keys)
+        
+        self.flush()
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor(dictionary=True)
+            # Lấy dư một dòng để biết còn trang sau hay không
+            cursor.execute(f"""
+                SELECT n.*, {select_keys}
+                FROM notes n
+                {joins}
+                {where_clause}
+                ORDER BY {order_clause}
+                LIMIT %s
+            """, tuple(params) + (limit + 1,))
+            rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
+            attachments = {}
+            if rows:
+                note_ids = tuple(row['note_id'] for row in rows)
+                placeholders = ', '.join(['%s'] * len(note_ids))
+                attachments = self._fetch_attachments(cursor, f"WHERE n.note_id IN ({placeholders})", note_ids)
+                self._resolve_lookups(cursor, rows)
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            print(f"Lỗi khi tải trang ghi chú: {e}")
+            return [], None
+        
+        notes = []
+        for row in rows:
+            # Ghi chú đã có trong bộ nhớ (đang sửa, đã hiển thị) được dùng lại
+            note = self._notes_by_id.get(row['note_id'])
+            if note is None:
+                note = self._row_to_note(row, attachments.get(row['note_id'], []))
+                self._notes_by_id[note.note_id] = note
+                self._note_added(note)
+            notes.append(note)
+        
+        next_cursor = tuple(rows[-1][f"k{i}"] for i in range(len(keys))) if has_more else None
+        return notes, next_cursor
+    
+    def count_notes(self) -> int:
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM notes")
+            count = cursor.fetchone()[0]
+            cursor.close()
+            conn.close()
+            return count
+        except Exception as e:
+            print(f"Lỗi khi đếm ghi chú: {e}")
+            return 0
+    
+    def query_notes(
+        self,
+        sort_by: str = "created_at",
+        reverse: bool = False,
+        filter_type: str = None,
+        category: str = None
+    ) -> List[Note]:
+        """Lọc/sắp xếp trên dữ liệu đã tải; chỉ query MySQL khi cache bị đánh dấu cũ"""
+        if self._stale:
+            self.load_notes()
+        return self._query_engine.query(sort_by, reverse, filter_type, category)
+    
+    def sort_in_memory(self, notes: List[Note], sort_by: str, reverse: bool = False) -> List[Note]:
+        return self._query_engine.sort(notes, sort_by, reverse)
+    
     def sort_notes(
         self,
         sort_by: str = "created_at", 
@@ -391,77 +1176,41 @@ class NoteRepository:
         filter_type: str = None,
         category: str = None
     ) -> List[Note]:
+        self.flush()
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
             where_conditions = []
+            params = []
             if filter_type == "important":
-                where_conditions.append("p.priority_name = 'Cao'")
+                where_conditions.append("n.priority_id = %s")
+                params.append(self._priority_ids.get('Cao'))
             elif filter_type == "completed":
                 where_conditions.append("n.is_completed = TRUE")
             
             if category and category != "Tất cả":
-                where_conditions.append(f"c.category_name = '{category}'")
+                where_conditions.append("n.category_id = %s")
+                params.append(self._category_ids.get(category))
             
             where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
             
             order_direction = "DESC" if reverse else "ASC"
+            joins = ""
             
             if sort_by == "title":
-                order_clause = f"n.title {order_direction}"
+                order_clause = f"n.title {order_direction}, n.note_id {order_direction}"
             elif sort_by == "priority":
-                order_clause = f"p.priority_level {'DESC' if not reverse else 'ASC'}"
+                joins = "LEFT JOIN priorities p ON n.priority_id = p.priority_id"
+                priority_direction = 'DESC' if not reverse else 'ASC'
+                order_clause = f"p.priority_level {priority_direction}, n.note_id {priority_direction}"
             elif sort_by == "updated_at":
-                order_clause = f"n.updated_at {order_direction}"
+                order_clause = f"n.updated_at {order_direction}, n.note_id {order_direction}"
             elif sort_by == "due_date":
-                order_clause = f"n.due_date IS NULL ASC, n.due_date {order_direction}"
+                order_clause = f"n.due_date IS NULL ASC, n.due_date {order_direction}, n.note_id {order_direction}"
             else:  # created_at
-                order_clause = f"n.is_completed ASC, n.created_at {order_direction}"
-            
-            query = f"""
-                SELECT 
-                    n.*,
-                    c.category_name as category,
-                    p.priority_name as priority
-                FROM notes n
-                LEFT JOIN categories c ON n.category_id = c.category_id
-                LEFT JOIN priorities p ON n.priority_id = p.priority_id
-                {where_clause}
-                ORDER BY {order_clause}
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            sorted_notes = []
-            for row in rows:
-                cursor.execute("""
-                    SELECT file_path 
-                    FROM attachments 
-                    WHERE note_id = %s
-                    ORDER BY uploaded_at DESC
-                """, (row['note_id'],))
-                attachments = [att['file_path'] for att in cursor.fetchall()]
-                
-                note = Note(
-                    note_id=row['note_id'],
-                    title=row['title'],
-                    content=row['content'] or '',
-                    category=row['category'] or 'Cá nhân',
-                    priority=row['priority'] or 'Thấp',
-                    is_completed=bool(row['is_completed']),
-                    due_date=row['due_date'].strftime('%Y-%m-%d') if row['due_date'] else None,
-                    attachments=attachments,
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
-                sorted_notes.append(note)
-            
-            cursor.close()
-            conn.close()
+                order_clause = f"n.is_completed ASC, n.created_at {order_direction}, n.note_id {order_direction}"
             
+            sorted_notes = list(self.iter_notes(where_clause, tuple(params), order_clause, joins))
             self.notes = sorted_notes
+            self._fully_loaded = not where_conditions
             return sorted_notes
             
         except Exception as e:
@@ -469,27 +1218,20 @@ class NoteRepository:
             return self.notes
     
     def get_categories(self) -> List[str]:
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT category_name FROM categories")
-            categories = [row['category_name'] for row in cursor.fetchall()]
-            cursor.close()
-            conn.close()
-            return categories
-        except Exception as e:
-            print(f"Lỗi khi lấy danh sách categories: {e}")
-            return []
+        if not self._category_ids:
+            self._refresh_lookups()
+        return list(self._category_ids)
     
     def add_category(self, category_name: str, category_color: str = "#3B82F6") -> bool:
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
+            cursor = conn.cursor(dictionary=True)
             cursor.execute(
                 "INSERT INTO categories (category_name, category_color) VALUES (%s, %s)",
                 (category_name, category_color)
             )
             conn.commit()
+            self._load_lookups(cursor)
             cursor.close()
             conn.close()
             return True
@@ -501,53 +1243,52 @@ class NoteRepository:
             return False
     
     def update_category(self, old_name: str, new_name: str) -> bool:
+        self.flush()
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
+            cursor = conn.cursor(dictionary=True)
             cursor.execute(
                 "UPDATE categories SET category_name = %s WHERE category_name = %s",
                 (new_name, old_name)
             )
             conn.commit()
+            self._load_lookups(cursor)
             cursor.close()
             conn.close()
+            self.invalidate_cache()
             return True
         except Exception as e:
             print(f"Lỗi khi cập nhật danh mục: {e}")
             return False
     
     def delete_category(self, category_name: str) -> bool:
+        self.flush()
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
+            cursor = conn.cursor(dictionary=True)
             cursor.execute(
                 "DELETE FROM categories WHERE category_name = %s",
                 (category_name,)
             )
             conn.commit()
+            self._load_lookups(cursor)
             cursor.close()
             conn.close()
+            self.invalidate_cache()
             return True
         except Exception as e:
             print(f"Lỗi khi xóa danh mục: {e}")
             return False
     
     def get_statistics(self) -> dict:
-        total = len(self.notes)
-        completed = len([n for n in self.notes if n.is_completed])
-        important = len([n for n in self.notes if n.priority == 'Cao'])
-        by_priority = {}
-        by_category = {}
-        
-        for note in self.notes:
-            by_priority[note.priority] = by_priority.get(note.priority, 0) + 1
-            by_category[note.category] = by_category.get(note.category, 0) + 1
-        
-        return {
-            'total': total,
-            'completed': completed,
-            'pending': total - completed,
-            'important': important,
-            'by_priority': by_priority,
-            'by_category': by_category
-        }
+        if self._fully_loaded:
+            return self._statistics.snapshot()
+        # Chế độ phân trang: đếm trên luồng từ DB thay vì các trang đã tải
+        return NoteStatistics.compute(self.iter_notes())
+    
+    def verify_statistics(self) -> bool:
+        """Debug: so bộ đếm thống kê với kết quả đếm lại toàn bộ ghi chú trong bộ nhớ"""
+        mismatches = self._statistics.verify(self._notes_by_id.values())
+        for key, (counted, expected) in mismatches.items():
+            print(f"Thống kê '{key}' lệch: bộ đếm {counted}, đếm lại {expected}")
+        return not mismatches
@@ -0,0 +1,138 @@
+"""
+Model: NoteStatistics
+Bộ đếm thống kê được cập nhật dần theo từng thay đổi, đọc không cần duyệt lại ghi chú
+"""
+
+import threading
+from collections import Counter
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from models.Note import Note
+from models.NoteQueryEngine import _due_ordinal
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constants import Priority
+
+# (is_completed, priority, category, ngày đến hạn dạng ordinal hoặc None)
+_Entry = Tuple[bool, Optional[str], Optional[str], Optional[int]]
+
+
+def _entry(note: Note) -> _Entry:
+    return bool(note.is_completed), note.priority, note.category, _due_ordinal(note.due_date)
+
+
+class NoteStatistics:
+    """
+    Giữ phần đóng góp của từng ghi chú (note_id -> _Entry) nên khi ghi chú bị
+    sửa tại chỗ chỉ cần trừ phần cũ, cộng phần mới. overdue và due_today chỉ
+    tính ghi chú chưa hoàn thành; số ghi chú chưa xong được đếm theo ngày đến
+    hạn để khi sang ngày mới chỉ cần cộng dồn các ngày vừa qua vào overdue.
+    """
+    
+    def __init__(self, today: Callable[[], date] = date.today):
+        self._today = today
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._entries: Dict[int, _Entry] = {}
+        self._completed = 0
+        self._by_priority: Counter = Counter()
+        self._by_category: Counter = Counter()
+        # ordinal ngày đến hạn -> số ghi chú chưa hoàn thành
+        self._pending_due: Counter = Counter()
+        self._day = self._today().toordinal()
+        self._overdue = 0
+    
+    def _apply(self, entry: _Entry, sign: int):
+        completed, priority, category, due = entry
+        self._completed += sign * completed
+        self._by_priority[priority] += sign
+        self._by_category[category] += sign
+        if due is not None and not completed:
+            self._pending_due[due] += sign
+            if due < self._day:
+                self._overdue += sign
+    
+    def _roll_day(self):
+        day = self._today().toordinal()
+        if day == self._day:
+            return
+        if day > self._day:
+            # Ghi chú đến hạn trong [ngày cũ, ngày mới) vừa trở thành quá hạn
+            if day - self._day <= len(self._pending_due):
+                passed = sum(self._pending_due.get(d, 0) for d in range(self._day, day))
+            else:
+                passed = sum(n for d, n in self._pending_due.items() if self._day <= d < day)
+            self._overdue += passed
+        else:
+            # Đồng hồ bị chỉnh lùi: đếm lại overdue
+            self._overdue = sum(n for d, n in self._pending_due.items() if d < day)
+        self._day = day
+    
+    # ==================== Cập nhật ====================
+    
+    def rebuild(self, notes: Iterable[Note]):
+        with self._lock:
+            self._reset()
+            for note in notes:
+                entry = _entry(note)
+                self._entries[note.note_id] = entry
+                self._apply(entry, 1)
+    
+    def upsert(self, note: Note):
+        """Ghi chú mới hoặc vừa sửa (sửa nội dung, đánh dấu hoàn thành, đổi hạn...)"""
+        entry = _entry(note)
+        with self._lock:
+            self._roll_day()
+            old = self._entries.get(note.note_id)
+            if old == entry:
+                return
+            if old is not None:
+                self._apply(old, -1)
+            self._entries[note.note_id] = entry
+            self._apply(entry, 1)
+    
+    def remove(self, note_id):
+        with self._lock:
+            self._roll_day()
+            old = self._entries.pop(note_id, None)
+            if old is not None:
+                self._apply(old, -1)
+    
+    # ==================== Đọc ====================
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._roll_day()
+            total = len(self._entries)
+            return {
+                'total': total,
+                'completed': self._completed,
+                'pending': total - self._completed,
+                'important': self._by_priority.get(Priority.HIGH, 0),
+                'by_priority': {k: v for k, v in self._by_priority.items() if v},
+                'by_category': {k: v for k, v in self._by_category.items() if v},
+                'overdue': self._overdue,
+                'due_today': self._pending_due.get(self._day, 0),
+            }
+    
+    @classmethod
+    def compute(cls, notes: Iterable[Note], today: Callable[[], date] = date.today) -> dict:
+        """Tính lại từ đầu trong một lượt duyệt"""
+        stats = cls(today)
+        stats.rebuild(notes)
+        return stats.snapshot()
+    
+    def verify(self, notes: Iterable[Note]) -> Dict[str, tuple]:
+        """
+        So bộ đếm với kết quả tính lại từ notes (dùng khi debug).
+        Trả về {tên: (bộ đếm, tính lại)} cho các mục lệch; rỗng nếu khớp.
+        """
+        expected = self.compute(notes, self._today)
+        actual = self.snapshot()
+        return {key: (actual[key], expected[key]) for key in expected if actual[key] != expected[key]}
@@ -0,0 +1,107 @@
+"""
+Model: NoteTransfer
+Đọc/ghi ghi chú theo luồng dưới dạng NDJSON hoặc CSV để nhập/xuất hàng loạt
+"""
+
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+from models.Note import Note
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CSV_FIELDS = [
+    'note_id', 'title', 'content', 'category', 'priority',
+    'created_at', 'updated_at', 'is_completed', 'due_date', 'attachments'
+]
+
+_EXTENSIONS = {'.ndjson': NDJSON, '.jsonl': NDJSON, '.json': NDJSON, '.csv': CSV}
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Định dạng chỉ định, hoặc đoán theo đuôi file (mặc định NDJSON, kể cả "-")"""
+    if fmt:
+        if fmt not in (NDJSON, CSV):
+            raise ValueError(f"Định dạng không hỗ trợ: {fmt}")
+        return fmt
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), NDJSON)
+
+
+@contextmanager
+def _open(path: str, mode: str):
+    # "-" là stdin/stdout để dùng được trong pipe
+    if path == "-":
+        yield sys.stdin if 'r' in mode else sys.stdout
+        return
+    with open(path, mode, encoding='utf-8', newline='') as f:
+        yield f
+
+
+def _from_csv_row(row: dict) -> dict:
+    data = {key: (value if value != '' else None) for key, value in row.items()}
+    data['content'] = data.get('content') or ''
+    data['is_completed'] = (data.get('is_completed') or '').lower() in ('1', 'true', 'yes')
+    data['attachments'] = json.loads(data['attachments']) if data.get('attachments') else []
+    return data
+
+
+def _to_csv_row(note: Note) -> dict:
+    data = note.to_dict()
+    data['is_completed'] = int(bool(data['is_completed']))
+    data['attachments'] = json.dumps(list(data['attachments']), ensure_ascii=False) if data['attachments'] else ''
+    return data
+
+
+def read_notes(path: str, fmt: Optional[str] = None,
+               on_error: Optional[Callable[[int, Exception], None]] = None) -> Iterator[Note]:
+    """
+    Đọc lần lượt từng ghi chú, không nạp cả file vào bộ nhớ. note_id được bỏ đi.
+    Dòng hỏng được bỏ qua và báo qua on_error(số dòng, lỗi), mặc định in ra stderr.
+    """
+    fmt = detect_format(path, fmt)
+    with _open(path, 'r') as f:
+        if fmt == CSV:
+            reader = csv.DictReader(f)
+            records = ((reader.line_num, row, _from_csv_row) for row in reader)
+        else:
+            records = ((line_no, line, json.loads) for line_no, line in enumerate(f, 1) if line.strip())
+        for line_no, raw, parse in records:
+            try:
+                data = parse(raw)
+                data.pop('note_id', None)
+                # Ô trống -> để Note.from_dict dùng giá trị mặc định thay vì None
+                for key in ('category', 'priority'):
+                    if not data.get(key):
+                        data.pop(key, None)
+                note = Note.from_dict(data)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(line_no, e)
+                else:
+                    print(f"Bỏ qua dòng {line_no}: {e}", file=sys.stderr)
+                continue
+            yield note
+
+
+def write_notes(notes: Iterable[Note], path: str, fmt: Optional[str] = None) -> int:
+    """Ghi lần lượt từng ghi chú; trả về số ghi chú đã ghi"""
+    fmt = detect_format(path, fmt)
+    count = 0
+    with _open(path, 'w') as f:
+        if fmt == CSV:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for note in notes:
+                writer.writerow(_to_csv_row(note))
+                count += 1
+        else:
+            for note in notes:
+                f.write(json.dumps(note.to_dict(), ensure_ascii=False))
+                f.write('\n')
+                count += 1
+    return count
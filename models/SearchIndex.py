@@ -0,0 +1,121 @@
+"""
+Model: SearchIndex
+Chỉ mục ngược (token -> note_id) cho tìm kiếm ghi chú, hỗ trợ tiếng Việt
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Set
+
+from models.Note import Note
+
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text: str, fold_diacritics: bool = True) -> str:
+    """casefold và (tùy chọn) bỏ dấu: "Ghi Chú Đẹp" -> "ghi chu dep" """
+    text = (text or '').casefold()
+    if fold_diacritics:
+        text = text.replace('đ', 'd')
+        text = unicodedata.normalize('NFD', text)
+        text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    return unicodedata.normalize('NFC', text)
+
+
+def tokenize(text: str, fold_diacritics: bool = True) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text, fold_diacritics))
+
+
+class SearchIndex:
+    """
+    Chỉ mục ngược cập nhật tăng dần theo add/update/remove.
+    Mỗi từ khóa trong câu tìm kiếm khớp như tiền tố của một token trong
+    tiêu đề hoặc nội dung; các từ khóa được giao (AND) với nhau.
+    """
+    
+    def __init__(self, fold_diacritics: bool = True):
+        self.fold_diacritics = fold_diacritics
+        self._postings: Dict[str, Set[int]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        # Danh sách token đã sắp xếp để tra tiền tố bằng bisect
+        self._vocab: List[str] = []
+        self._lock = threading.RLock()
+    
+    def _note_tokens(self, note: Note) -> Set[str]:
+        return set(tokenize(note.title, self.fold_diacritics)) | \
+            set(tokenize(note.content, self.fold_diacritics))
+    
+    def add(self, note: Note):
+        tokens = self._note_tokens(note)
+        with self._lock:
+            self._remove_locked(note.note_id)
+            self._doc_tokens[note.note_id] = tokens
+            for token in tokens:
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = set()
+                    bisect.insort(self._vocab, token)
+                posting.add(note.note_id)
+    
+    def update(self, note: Note):
+        self.add(note)
+    
+    def remove(self, note_id):
+        with self._lock:
+            self._remove_locked(note_id)
+    
+    def _remove_locked(self, note_id):
+        for token in self._doc_tokens.pop(note_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(note_id)
+            if not posting:
+                del self._postings[token]
+                i = bisect.bisect_left(self._vocab, token)
+                if i < len(self._vocab) and self._vocab[i] == token:
+                    del self._vocab[i]
+    
+    def rebuild(self, notes: Iterable[Note]):
+        postings: Dict[str, Set[int]] = {}
+        doc_tokens: Dict[int, Set[str]] = {}
+        for note in notes:
+            tokens = self._note_tokens(note)
+            doc_tokens[note.note_id] = tokens
+            for token in tokens:
+                postings.setdefault(token, set()).add(note.note_id)
+        
+        # Dựng xong mới thay thế, chỉ sắp xếp từ điển một lần
+        with self._lock:
+            self._postings = postings
+            self._doc_tokens = doc_tokens
+            self._vocab = sorted(postings)
+    
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        result: Set[int] = set()
+        i = bisect.bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            result |= self._postings[self._vocab[i]]
+            i += 1
+        return result
+    
+    def search(self, query: str) -> Set[int]:
+        terms = sorted(set(tokenize(query, self.fold_diacritics)), key=len, reverse=True)
+        if not terms:
+            return set()
+        
+        with self._lock:
+            result = None
+            # Từ dài thường ít kết quả hơn -> giao trước để tập nhỏ nhanh
+            for term in terms:
+                ids = self._prefix_ids(term)
+                result = ids if result is None else result & ids
+                if not result:
+                    return set()
+            return result
+    
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
@@ -0,0 +1,182 @@
+"""
+Model: ThumbnailStore
+Lưu thumbnail của ảnh đính kèm trên đĩa, đặt tên theo nội dung file gốc
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from models.FileHash import file_digest
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+# Nhật ký luôn được gộp vào index.json khi dài hơn ngưỡng này và hơn số mục trong index
+_COMPACT_MIN = 1000
+
+
+class ThumbnailStore:
+    """
+    Thumbnail được đặt tên theo sha256 của file gốc nên các file trùng nội dung
+    dùng chung một thumbnail. index.json ghi lại (mtime, size, digest) của mỗi
+    file gốc; khi file gốc thay đổi, thumbnail được tạo lại.
+    
+    Mỗi thay đổi chỉ nối một dòng vào index.log; nhật ký được gộp vào
+    index.json khi đủ dài nên chi phí mỗi lần ensure/discard không tăng theo
+    số đính kèm. Số file gốc dùng mỗi digest được đếm sẵn trong bộ nhớ.
+    """
+    
+    def __init__(self, thumbs_dir: str, size: Tuple[int, int] = (120, 120)):
+        self.thumbs_dir = thumbs_dir
+        self.size = tuple(size)
+        self._index_path = os.path.join(thumbs_dir, "index.json")
+        self._log_path = os.path.join(thumbs_dir, "index.log")
+        self._lock = threading.RLock()
+        self._log_entries = 0
+        self._index: Dict[str, dict] = self._load_index()
+        # digest -> số file gốc đang dùng thumbnail đó
+        self._refs: Dict[str, int] = {}
+        for entry in self._index.values():
+            self._refs[entry['digest']] = self._refs.get(entry['digest'], 0) + 1
+    
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        try:
+            with open(self._log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Dòng ghi dở khi ứng dụng bị tắt đột ngột
+                        continue
+                    self._log_entries += 1
+                    if record['entry'] is None:
+                        index.pop(record['key'], None)
+                    else:
+                        index[record['key']] = record['entry']
+        except OSError:
+            pass
+        return index
+    
+    def _record(self, key: str, entry: Optional[dict]):
+        """Nối một thay đổi (entry None = xóa) vào nhật ký; gộp lại khi nhật ký đã dài"""
+        os.makedirs(self.thumbs_dir, exist_ok=True)
+        with open(self._log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'entry': entry}) + '\n')
+        self._log_entries += 1
+        if self._log_entries > max(_COMPACT_MIN, len(self._index)):
+            self._compact()
+    
+    def _compact(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+        # Nếu bị tắt giữa hai bước, phát lại nhật ký cũ trên index mới vẫn cho cùng kết quả
+        os.remove(self._log_path)
+        self._log_entries = 0
+    
+    def _unref(self, digest: str) -> bool:
+        """Giảm số tham chiếu; True nếu thumbnail không còn file gốc nào dùng"""
+        count = self._refs.get(digest, 0) - 1
+        if count > 0:
+            self._refs[digest] = count
+            return False
+        self._refs.pop(digest, None)
+        return True
+    
+    def _remove_thumb(self, digest: str):
+        try:
+            os.remove(self._thumb_path(digest))
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _key(source: str) -> str:
+        return os.path.abspath(source)
+    
+    def _thumb_path(self, digest: str) -> str:
+        width, height = self.size
+        return os.path.join(self.thumbs_dir, f"{digest}_{width}x{height}.png")
+    
+    @staticmethod
+    def is_image(path: str) -> bool:
+        return path.lower().endswith(IMAGE_EXTENSIONS)
+    
+    def get(self, source: str) -> Optional[str]:
+        """Đường dẫn thumbnail nếu còn hợp lệ, không bao giờ giải mã ảnh gốc"""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._index.get(self._key(source))
+        if not entry or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            return None
+        thumb_path = self._thumb_path(entry['digest'])
+        return thumb_path if os.path.exists(thumb_path) else None
+    
+    def ensure(self, source: str, digest: Optional[str] = None) -> Optional[str]:
+        """Tạo thumbnail nếu chưa có hoặc file gốc đã đổi; trả về đường dẫn hoặc None"""
+        if not self.is_image(source):
+            return None
+        existing = self.get(source)
+        if existing:
+            return existing
+        
+        try:
+            stat = os.stat(source)
+            digest = digest or file_digest(source)
+            thumb_path = self._thumb_path(digest)
+            if not os.path.exists(thumb_path):
+                self._render(source, thumb_path)
+        except Exception as e:
+            print(f"Lỗi khi tạo thumbnail cho {source}: {e}")
+            return None
+        
+        key = self._key(source)
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest,
+        }
+        with self._lock:
+            old = self._index.get(key)
+            self._index[key] = entry
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            # File gốc đã đổi nội dung: thumbnail cũ có thể không còn ai dùng
+            unused = old is not None and self._unref(old['digest'])
+            self._record(key, entry)
+        if unused:
+            self._remove_thumb(old['digest'])
+        return thumb_path
+    
+    def _render(self, source: str, thumb_path: str):
+        # Pillow chỉ cần khi thực sự tạo thumbnail
+        from PIL import Image
+        
+        os.makedirs(self.thumbs_dir, exist_ok=True)
+        with Image.open(source) as img:
+            img.thumbnail(self.size, Image.Resampling.LANCZOS)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            tmp_path = thumb_path + ".tmp"
+            img.save(tmp_path, format="PNG")
+        os.replace(tmp_path, thumb_path)
+    
+    def discard(self, source: str):
+        """Bỏ thumbnail của file gốc; file thumbnail chỉ bị xóa khi không còn ai dùng"""
+        key = self._key(source)
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry is None:
+                return
+            unused = self._unref(entry['digest'])
+            self._record(key, None)
+        if unused:
+            self._remove_thumb(entry['digest'])
@@ -0,0 +1,110 @@
+"""
+Model: WriteBehindQueue
+Gom các thay đổi ghi chú trong bộ nhớ rồi ghi xuống MySQL theo lô ở thread nền
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, List, Set
+
+
+class WriteBehindQueue:
+    """
+    Chỉ lưu note_id "bẩn": sửa cùng một ghi chú nhiều lần trước khi flush chỉ
+    tạo một dòng UPDATE với trạng thái mới nhất. Thread nền flush sau mỗi
+    flush_interval giây, hoặc sớm hơn khi số ghi chú chờ đạt max_pending.
+    flush_interval là khoảng dữ liệu tối đa có thể mất nếu ứng dụng bị tắt đột ngột.
+    """
+    
+    def __init__(
+        self,
+        flush_fn: Callable[[List[int]], None],
+        flush_interval: float = 0.5,
+        max_pending: int = 200
+    ):
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._dirty: Set[int] = set()
+        self._cond = threading.Condition()
+        # Chỉ một lần flush tại một thời điểm (thread nền hoặc flush() gọi tay)
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._marks = 0
+        self._flushes = 0
+        self._rows_written = 0
+        self._failures = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+    
+    def mark_dirty(self, note_id):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue đã đóng")
+            self._dirty.add(note_id)
+            self._marks += 1
+            if len(self._dirty) >= self.max_pending:
+                self._cond.notify()
+    
+    def discard(self, note_ids: Iterable[int]):
+        """Bỏ các ghi chú khỏi hàng đợi (ví dụ khi vừa bị xóa)"""
+        with self._cond:
+            self._dirty.difference_update(note_ids)
+    
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._dirty)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._dirty) < self.max_pending:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+    
+    def flush(self) -> bool:
+        """Ghi ngay mọi thay đổi đang chờ; lỗi thì giữ lại để lần sau thử lại"""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._dirty)
+                self._dirty.clear()
+            if not batch:
+                return True
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                print(f"Lỗi khi ghi dữ liệu nền: {e}")
+                with self._cond:
+                    self._dirty.update(batch)
+                    self._failures += 1
+                return False
+            with self._cond:
+                self._flushes += 1
+                self._rows_written += len(batch)
+            return True
+    
+    def close(self, timeout: float = 5.0) -> bool:
+        """Dừng thread nền và flush phần còn lại; False nếu vẫn còn dữ liệu chưa ghi được"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while not self.flush():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+    
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                'pending': len(self._dirty),
+                'marks': self._marks,
+                'flushes': self._flushes,
+                'rows_written': self._rows_written,
+                'coalesced': self._marks - self._rows_written - len(self._dirty),
+                'failures': self._failures,
+            }
@@ -0,0 +1,124 @@
+"""
+View: ImageCache
+Cache ảnh đã giải mã/thu nhỏ dùng chung cho icon, thumbnail và trình xem ảnh
+"""
+
+import customtkinter as ctk
+from collections import OrderedDict
+from typing import Optional, Tuple
+import os
+import threading
+
+
+class ImageCache:
+    """
+    LRU giới hạn theo số byte đã giải mã. Khóa là (path, mtime, size file,
+    kích thước đích, kiểu thu nhỏ) nên file bị sửa trên đĩa sẽ tự được đọc lại.
+    """
+    
+    RESIZE = "resize"        # Đúng kích thước (icon)
+    THUMBNAIL = "thumbnail"  # Giữ tỉ lệ, vừa trong khung
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # key -> [PIL image, CTkImage hoặc None, số byte]
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def _make_key(self, path: str, size: Tuple[int, int], fit: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, tuple(size), fit)
+    
+    @staticmethod
+    def _decode(path: str, size: Tuple[int, int], fit: str):
+        # Pillow chỉ nạp khi thực sự giải mã ảnh
+        from PIL import Image
+        
+        with Image.open(path) as src:
+            if fit == ImageCache.RESIZE:
+                return src.resize(size, Image.Resampling.LANCZOS)
+            src.thumbnail(size, Image.Resampling.LANCZOS)
+            return src.copy()
+    
+    @staticmethod
+    def _image_bytes(img) -> int:
+        return img.width * img.height * len(img.getbands())
+    
+    def _lookup(self, key: tuple) -> Optional[list]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+            return entry
+    
+    def _store(self, key: tuple, img) -> list:
+        nbytes = self._image_bytes(img)
+        entry = [img, None, nbytes]
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = entry
+            self._bytes += nbytes
+            # Luôn giữ lại ít nhất ảnh vừa thêm
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._evictions += 1
+        return entry
+    
+    def _get_entry(self, path: str, size: Tuple[int, int], fit: str) -> Optional[list]:
+        key = self._make_key(path, size, fit)
+        if key is None:
+            return None
+        entry = self._lookup(key)
+        if entry is None:
+            try:
+                entry = self._store(key, self._decode(path, size, fit))
+            except Exception as e:
+                print(f"Lỗi khi đọc ảnh {path}: {e}")
+                return None
+        return entry
+    
+    def get_image(self, path: str, size: Tuple[int, int], fit: str = THUMBNAIL):
+        """Ảnh PIL đã thu nhỏ, hoặc None nếu file không tồn tại/không đọc được"""
+        entry = self._get_entry(path, size, fit)
+        return entry[0] if entry else None
+    
+    def get_ctk_image(self, path: str, size: Tuple[int, int], fit: str = RESIZE) -> Optional[ctk.CTkImage]:
+        """CTkImage dùng chung cho mọi widget hiển thị cùng ảnh"""
+        entry = self._get_entry(path, size, fit)
+        if entry is None:
+            return None
+        if entry[1] is None:
+            img = entry[0]
+            entry[1] = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
+        return entry[1]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+            }
@@ -5,10 +5,7 @@ Giao diện chính của ứng dụng (Microsoft To Do style)
 
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
-from datetime import datetime, date, timedelta
 from typing import Optional, Callable, List
-from tkcalendar import DateEntry
-from PIL import Image, ImageTk
 import os
 import sys
 
@@ -18,6 +15,8 @@ from constants import (
     FilterType, Priority, Colors, SortOption,
     FileConstraints, UIConstants, Messages
 )
+from views.NoteListView import VirtualNoteList
+from views.ImageCache import ImageCache
 
 
 class MainView:
@@ -41,11 +40,19 @@ class MainView:
         self.on_add_category: Optional[Callable] = None
         self.on_edit_category: Optional[Callable] = None
         self.on_delete_category: Optional[Callable] = None
+        # file đính kèm -> đường dẫn thumbnail đã lưu (hoặc None)
+        self.get_attachment_thumbnail: Optional[Callable] = None
+        self.get_attachment_name: Optional[Callable] = None
+        # Phân trang: on_load_more được gọi khi cuộn tới cuối, has_more_notes cho biết còn trang sau
+        self.on_load_more: Optional[Callable] = None
+        self.has_more_notes: Optional[Callable] = None
         
         self.selected_note_id: Optional[str] = None
         self.current_filter = FilterType.ALL
         self.available_categories: List[str] = []
         
+        # Cache ảnh dùng chung cho icon, thumbnail đính kèm và trình xem ảnh
+        self.image_cache = ImageCache(max_bytes=UIConstants.IMAGE_CACHE_MAX_BYTES)
         self._load_icons()
         
         self.colors = {
@@ -62,113 +69,27 @@ class MainView:
         
         self._setup_ui()
     
+    # Thuộc tính -> (file trong icons/, kích thước)
+    ICONS = {
+        'star_icon': ("star.png", 20),
+        'star_blank_icon': ("star_blank.png", 20),
+        'category_icon': ("category-list.png", 18),
+        'check_icon': ("check.png", 16),
+        'calendar_icon': ("calendar.png", 16),
+        'attachment_icon': ("attachment.png", 16),
+        'add_icon': ("add.png", 16),
+        'delete_icon': ("delete.png", 16),
+        'search_icon': ("search.png", 16),
+        'save_icon': ("save.png", 16),
+        'file_icon': ("file.png", 18),
+    }
+    
     def _load_icons(self):
-        try:
-            icons_dir = os.path.join(os.path.dirname(__file__), "..", "icons")
-            
-            # Star icons
-            star_path = os.path.join(icons_dir, "star.png")
-            star_blank_path = os.path.join(icons_dir, "star_blank.png")
-            
-            if os.path.exists(star_path):
-                star_img = Image.open(star_path)
-                star_img = star_img.resize((20, 20), Image.Resampling.LANCZOS)
-                self.star_icon = ctk.CTkImage(light_image=star_img, dark_image=star_img, size=(20, 20))
-            else:
-                self.star_icon = None
-            
-            if os.path.exists(star_blank_path):
-                star_blank_img = Image.open(star_blank_path)
-                star_blank_img = star_blank_img.resize((20, 20), Image.Resampling.LANCZOS)
-                self.star_blank_icon = ctk.CTkImage(light_image=star_blank_img, dark_image=star_blank_img, size=(20, 20))
-            else:
-                self.star_blank_icon = None
-            
-            category_path = os.path.join(icons_dir, "category-list.png")
-            if os.path.exists(category_path):
-                category_img = Image.open(category_path)
-                category_img = category_img.resize((18, 18), Image.Resampling.LANCZOS)
-                self.category_icon = ctk.CTkImage(light_image=category_img, dark_image=category_img, size=(18, 18))
-            else:
-                self.category_icon = None
-            
-            check_path = os.path.join(icons_dir, "check.png")
-            if os.path.exists(check_path):
-                check_img = Image.open(check_path)
-                check_img = check_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.check_icon = ctk.CTkImage(light_image=check_img, dark_image=check_img, size=(16, 16))
-            else:
-                self.check_icon = None
-            
-            calendar_path = os.path.join(icons_dir, "calendar.png")
-            if os.path.exists(calendar_path):
-                calendar_img = Image.open(calendar_path)
-                calendar_img = calendar_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.calendar_icon = ctk.CTkImage(light_image=calendar_img, dark_image=calendar_img, size=(16, 16))
-            else:
-                self.calendar_icon = None
-            
-            attachment_path = os.path.join(icons_dir, "attachment.png")
-            if os.path.exists(attachment_path):
-                attachment_img = Image.open(attachment_path)
-                attachment_img = attachment_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.attachment_icon = ctk.CTkImage(light_image=attachment_img, dark_image=attachment_img, size=(16, 16))
-            else:
-                self.attachment_icon = None
-            
-            add_path = os.path.join(icons_dir, "add.png")
-            if os.path.exists(add_path):
-                add_img = Image.open(add_path)
-                add_img = add_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.add_icon = ctk.CTkImage(light_image=add_img, dark_image=add_img, size=(16, 16))
-            else:
-                self.add_icon = None
-            
-            delete_path = os.path.join(icons_dir, "delete.png")
-            if os.path.exists(delete_path):
-                delete_img = Image.open(delete_path)
-                delete_img = delete_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.delete_icon = ctk.CTkImage(light_image=delete_img, dark_image=delete_img, size=(16, 16))
-            else:
-                self.delete_icon = None
-            
-            search_path = os.path.join(icons_dir, "search.png")
-            if os.path.exists(search_path):
-                search_img = Image.open(search_path)
-                search_img = search_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.search_icon = ctk.CTkImage(light_image=search_img, dark_image=search_img, size=(16, 16))
-            else:
-                self.search_icon = None
-            
-            save_path = os.path.join(icons_dir, "save.png")
-            if os.path.exists(save_path):
-                save_img = Image.open(save_path)
-                save_img = save_img.resize((16, 16), Image.Resampling.LANCZOS)
-                self.save_icon = ctk.CTkImage(light_image=save_img, dark_image=save_img, size=(16, 16))
-            else:
-                self.save_icon = None
-            
-            file_path = os.path.join(icons_dir, "file.png")
-            if os.path.exists(file_path):
-                file_img = Image.open(file_path)
-                file_img = file_img.resize((18, 18), Image.Resampling.LANCZOS)
-                self.file_icon = ctk.CTkImage(light_image=file_img, dark_image=file_img, size=(18, 18))
-            else:
-                self.file_icon = None
-                
-        except Exception as e:
-            print(f"Lỗi khi load icons: {e}")
-            self.star_icon = None
-            self.star_blank_icon = None
-            self.category_icon = None
-            self.check_icon = None
-            self.calendar_icon = None
-            self.attachment_icon = None
-            self.add_icon = None
-            self.delete_icon = None
-            self.search_icon = None
-            self.save_icon = None
-            self.file_icon = None
+        icons_dir = os.path.join(os.path.dirname(__file__), "..", "icons")
+        for attr, (file_name, size) in self.ICONS.items():
+            # None nếu thiếu file -> các widget dùng bản không icon
+            icon = self.image_cache.get_ctk_image(os.path.join(icons_dir, file_name), (size, size))
+            setattr(self, attr, icon)
     
     def _setup_ui(self):
         # Configure grid - column 0: sidebar trái, column 1: main content, column 2: detail panel phải
@@ -533,12 +454,13 @@ class MainView:
         add_btn.grid(row=0, column=1, padx=(0, 10), pady=10)
     
     def _create_notes_list(self):
-        self.notes_list_frame = ctk.CTkScrollableFrame(
-            self.main_content,
-            fg_color="transparent"
-        )
+        # Danh sách ảo hóa: chỉ dựng widget cho các dòng đang nhìn thấy
+        self.notes_list_frame = VirtualNoteList(self.main_content, icons=self)
         self.notes_list_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=(0, 20))
-        self.notes_list_frame.grid_columnconfigure(0, weight=1)
+        self.notes_list_frame.on_note_click = self._on_note_click
+        self.notes_list_frame.on_toggle_completed = self._on_toggle_completed
+        self.notes_list_frame.on_toggle_important = self._on_toggle_important
+        self.notes_list_frame.on_reach_end = self._on_list_reach_end
     
     # ==================== Detail Panel ====================
     
@@ -575,204 +497,36 @@ class MainView:
     
     # ==================== Display Notes ====================
     
+    def show_loading(self):
+        """Cửa sổ đã hiện nhưng dữ liệu còn đang tải nền"""
+        self.count_label.configure(text=Messages.LOADING)
+    
     def display_notes(self, notes: list):
-        for widget in self.notes_list_frame.winfo_children():
-            widget.destroy()
-        
-        self.count_label.configure(text=f"{len(notes)} ghi chú")
-        
-        for note in notes:
-            self._create_note_item(note)
-        
-        if not notes:
-            empty_label = ctk.CTkLabel(
-                self.notes_list_frame,
-                text=Messages.INFO_NO_NOTES,
-                font=ctk.CTkFont(size=16),
-                text_color=("gray50", "gray60")
-            )
-            empty_label.pack(pady=50)
+        self.notes_list_frame.set_notes(notes)
+        self._update_count_label()
     
-    def _create_note_item(self, note):
-        # Container
-        note_frame = ctk.CTkFrame(
-            self.notes_list_frame,
-            fg_color=("gray85", "gray20"),
-            corner_radius=10,
-            border_width=1,
-            border_color=("gray70", "gray30")
-        )
-        note_frame.pack(fill="x", pady=5)
-        
-        # Bind click để xem chi tiết
-        note_frame.bind("<Button-1>", lambda e, n=note: self._on_note_click(n))
-        
-        # Inner frame
-        inner_frame = ctk.CTkFrame(note_frame, fg_color="transparent")
-        inner_frame.pack(fill="x", padx=15, pady=12)
-        
-        # Priority bar (left side) - Luôn hiển thị để tránh checkbox bị lệch
-        priority_color = Colors.get_priority_color(note.priority)
-        
-        priority_bar = ctk.CTkFrame(
-            inner_frame,
-            width=4,
-            height=40,
-            fg_color=priority_color,
-            corner_radius=2
-        )
-        priority_bar.pack(side="left", padx=(0, 10))
-        
-        # Checkbox
-        check_var = ctk.BooleanVar(value=note.is_completed)
-        checkbox = ctk.CTkCheckBox(
-            inner_frame,
-            text="",
-            variable=check_var,
-            width=24,
-            checkbox_width=24,
-            checkbox_height=24,
-            command=lambda: self._on_toggle_completed(note.note_id)
-        )
-        checkbox.pack(side="left", padx=(0, 15))
-        
-        # Text content
-        text_frame = ctk.CTkFrame(inner_frame, fg_color="transparent")
-        text_frame.pack(side="left", fill="x", expand=True)
-        text_frame.bind("<Button-1>", lambda e, n=note: self._on_note_click(n))
-        
-        # Title
-        title_font = ctk.CTkFont(size=14, overstrike=note.is_completed)
-        title_color = ("gray60", "gray60") if note.is_completed else ("gray10", "gray90")
-        
-        title_label = ctk.CTkLabel(
-            text_frame,
-            text=note.title,
-            font=title_font,
-            text_color=title_color,
-            anchor="w"
-        )
-        title_label.pack(anchor="w")
-        title_label.bind("<Button-1>", lambda e, n=note: self._on_note_click(n))
-        
-        # Info row (category, attachments, due date) - chỉ tạo khi có thông tin
-        has_info = (note.category != FilterType.ALL) or note.attachments or note.due_date
-        
-        if has_info:
-            info_frame = ctk.CTkFrame(text_frame, fg_color="transparent")
-            info_frame.pack(anchor="w", pady=(3, 0))
-            
-            # Category
-            if note.category != FilterType.ALL:
-                category_label = ctk.CTkLabel(
-                    info_frame,
-                    text=f"{note.category}",
-                    font=ctk.CTkFont(size=11),
-                    text_color=("gray50", "gray60")
-                )
-                category_label.pack(side="left", padx=(0, 10))
-            
-            # Attachments
-            if note.attachments:
-                if self.attachment_icon:
-                    attach_label = ctk.CTkLabel(
-                        info_frame,
-                        text=f" {len(note.attachments)}",
-                        image=self.attachment_icon,
-                        compound="left",
-                        font=ctk.CTkFont(size=11),
-                        text_color=("gray50", "gray60")
-                    )
-                else:
-                    attach_label = ctk.CTkLabel(
-                        info_frame,
-                        text=f"📎 {len(note.attachments)}",
-                        font=ctk.CTkFont(size=11),
-                        text_color=("gray50", "gray60")
-                    )
-                attach_label.pack(side="left", padx=(0, 10))
-            
-            # Due date
-            if note.due_date:
-                due_color = self._get_due_date_color(note.due_date)
-                if self.calendar_icon:
-                    due_label = ctk.CTkLabel(
-                        info_frame,
-                        text=f" {self._format_due_date(note.due_date)}",
-                        image=self.calendar_icon,
-                        compound="left",
-                        font=ctk.CTkFont(size=11),
-                        text_color=due_color
-                    )
-                else:
-                    due_label = ctk.CTkLabel(
-                        info_frame,
-                        text=f"📅 {self._format_due_date(note.due_date)}",
-                        font=ctk.CTkFont(size=11),
-                        text_color=due_color
-                    )
-                due_label.pack(side="left", padx=(0, 10))
-        
-        # Star button (importance - based on priority)
-        is_important = note.priority == "Cao"
-        
-        if self.star_icon and self.star_blank_icon:
-            star_btn = ctk.CTkButton(
-                inner_frame,
-                text="",
-                image=self.star_icon if is_important else self.star_blank_icon,
-                width=40,
-                height=40,
-                fg_color="transparent",
-                hover_color=("gray75", "gray25"),
-                command=lambda: self._on_toggle_important(note.note_id)
-            )
-        else:
-            star_text = " "
-            star_btn = ctk.CTkButton(
-                inner_frame,
-                text=star_text,
-                width=40,
-                height=40,
-                font=ctk.CTkFont(size=20),
-                fg_color="transparent",
-                hover_color=("gray75", "gray25"),
-                text_color=self.colors['star'] if is_important else ("gray50", "gray60"),
-                command=lambda: self._on_toggle_important(note.note_id)
-            )
-        star_btn.pack(side="right")
+    def append_notes(self, notes: list):
+        """Nối trang tiếp theo vào danh sách đang hiển thị"""
+        self.notes_list_frame.append_notes(notes)
+        self._update_count_label()
     
-    def _get_due_date_color(self, due_date_str: str):
-        try:
-            due = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-            today = date.today()
-            
-            if due < today:
-                return self.colors['danger']  # Quá hạn
-            elif due == today:
-                return self.colors['warning']  # Hôm nay
-            else:
-                return self.colors['accent']  # Sắp tới
-        except:
-            return ("gray50", "gray60")
+    def refresh_note(self, note):
+        """Vẽ lại dòng của một ghi chú vừa sửa mà không dựng lại danh sách"""
+        self.notes_list_frame.refresh_note(note)
     
-    def _format_due_date(self, due_date_str: str) -> str:
-        """Format due date"""
-        try:
-            due = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-            today = date.today()
-            
-            if due == today:
-                return "Hôm nay"
-            elif due == today + timedelta(days=1):
-                return "Ngày mai"
-            elif due < today:
-                days_ago = (today - due).days
-                return f"Quá {days_ago} ngày"
-            else:
-                return due.strftime("%d/%m/%Y")
-        except:
-            return due_date_str
+    def remove_note(self, note_id):
+        """Bỏ một ghi chú khỏi danh sách đang hiển thị, giữ nguyên các trang đã tải"""
+        self.notes_list_frame.remove_note(note_id)
+        self._update_count_label()
+    
+    def _update_count_label(self):
+        count = len(self.notes_list_frame.notes)
+        more = "+" if self.has_more_notes and self.has_more_notes() else ""
+        self.count_label.configure(text=f"{count}{more} ghi chú")
+    
+    def _on_list_reach_end(self):
+        if self.on_load_more and self.has_more_notes and self.has_more_notes():
+            self.on_load_more()
     
     # ==================== Detail Panel ====================
     
@@ -953,41 +707,62 @@ class MainView:
             )
         add_attach_btn.pack(fill="x", pady=(0, 10))
         
+        # Tiến độ thêm đính kèm chạy nền, chỉ hiện khi đang copy
+        self._attach_btn = add_attach_btn
+        self.attachment_progress = ctk.CTkProgressBar(self.detail_content_frame)
+        
         for attachment in note.attachments:
             self._create_attachment_widget(attachment, note.note_id)
     
+    def show_attachment_progress(self, note_id: str, fraction: Optional[float]):
+        """Cập nhật thanh tiến độ; fraction=None để ẩn"""
+        if self.selected_note_id != note_id or not hasattr(self, 'attachment_progress'):
+            return
+        if not self.attachment_progress.winfo_exists():
+            return
+        if fraction is None:
+            self.attachment_progress.pack_forget()
+            return
+        if not self.attachment_progress.winfo_ismapped():
+            self.attachment_progress.pack(fill="x", pady=(0, 10), after=self._attach_btn)
+        self.attachment_progress.set(fraction)
+    
     def _create_attachment_widget(self, file_path: str, note_id: str):
         """Tạo widget hiển thị file đính kèm"""
         attach_frame = ctk.CTkFrame(self.detail_content_frame)
         attach_frame.pack(fill="x", pady=8)
         
         thumbnail_created = False
-        try:
-            if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-                img = Image.open(file_path)
-                img.thumbnail((120, 120))
-                photo = ImageTk.PhotoImage(img)
-                
-                img_button = ctk.CTkButton(
-                    attach_frame,
-                    image=photo,
-                    text="",
-                    width=120,
-                    height=120,
-                    fg_color="transparent",
-                    hover_color=("gray85", "gray25"),
-                    command=lambda: self._open_image(file_path)
+        if file_path.lower().endswith(tuple(FileConstraints.ALLOWED_IMAGE_EXTENSIONS)):
+            # Chỉ đọc thumbnail nhỏ đã lưu, không giải mã ảnh gốc
+            thumb_path = self.get_attachment_thumbnail(file_path) if self.get_attachment_thumbnail else None
+            thumbnail = None
+            if thumb_path:
+                thumbnail = self.image_cache.get_ctk_image(
+                    thumb_path, UIConstants.THUMBNAIL_SIZE, fit=ImageCache.THUMBNAIL
                 )
-                img_button.image = photo
-                img_button.pack(side="left", padx=15, pady=8)
-                thumbnail_created = True
-        except Exception as e:
-            print(f"Error loading thumbnail: {e}")
+            
+            img_button = ctk.CTkButton(
+                attach_frame,
+                image=thumbnail,
+                text="" if thumbnail else "🖼",
+                width=120,
+                height=120,
+                font=ctk.CTkFont(size=32),
+                fg_color="transparent" if thumbnail else ("gray80", "gray25"),
+                hover_color=("gray85", "gray25"),
+                command=lambda: self._open_image(file_path)
+            )
+            img_button.pack(side="left", padx=15, pady=8)
+            thumbnail_created = True
         
         info_frame = ctk.CTkFrame(attach_frame, fg_color="transparent")
         info_frame.pack(side="left", fill="x", expand=True, padx=8)
         
-        file_name = os.path.basename(file_path)
+        if self.get_attachment_name:
+            file_name = self.get_attachment_name(note_id, file_path)
+        else:
+            file_name = os.path.basename(file_path)
         name_label = ctk.CTkLabel(
             info_frame,
             text=file_name,
@@ -1026,22 +801,20 @@ class MainView:
             image_window = ctk.CTkToplevel(self.root)
             image_window.title(f"Xem ảnh - {os.path.basename(file_path)}")
             
-            img = Image.open(file_path)
-            
-            max_width = 1000
-            max_height = 800
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-            
-            image_window.geometry(f"{img.width + 40}x{img.height + 40}")
+            photo = self.image_cache.get_ctk_image(
+                file_path, UIConstants.IMAGE_VIEWER_MAX_SIZE, fit=ImageCache.THUMBNAIL
+            )
+            if photo is None:
+                raise ValueError(Messages.ERROR_NO_IMAGE)
             
-            photo = ImageTk.PhotoImage(img)
+            width, height = photo.cget("size")
+            image_window.geometry(f"{width + 40}x{height + 40}")
             
             img_label = ctk.CTkLabel(
                 image_window,
                 image=photo,
                 text=""
             )
-            img_label.image = photo
             img_label.pack(padx=20, pady=20)
             
             image_window.bind("<Escape>", lambda e: image_window.destroy())
@@ -1118,6 +891,8 @@ class MainView:
         else:
             self.category_menu_btn.grid()
         
+        self.notes_list_frame.scroll_to_top()
+        
         if self.on_filter_change:
             self.on_filter_change(filter_name)
     
@@ -1255,6 +1030,8 @@ class MainView:
         cal_frame = ctk.CTkFrame(dialog)
         cal_frame.pack(pady=10)
         
+        # tkcalendar chỉ cần khi mở hộp chọn ngày, không làm chậm lúc khởi động
+        from tkcalendar import DateEntry
         cal = DateEntry(
             cal_frame,
             width=12,
@@ -0,0 +1,465 @@
+"""
+View: NoteListView
+Danh sách ghi chú ảo hóa: chỉ tạo widget cho các dòng đang hiển thị
+"""
+
+import customtkinter as ctk
+from datetime import datetime, date, timedelta
+from typing import Callable, Dict, List, Optional
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constants import FilterType, Priority, Colors, Messages
+
+
+ROW_HEIGHT = 78   # Chiều cao một dòng, gồm cả khoảng cách giữa các dòng
+ROW_GAP = 10
+OVERSCAN = 4      # Số dòng dựng thêm phía trên/dưới vùng nhìn thấy
+
+
+def format_due_date(due_date_str: str) -> str:
+    """Format due date"""
+    try:
+        due = datetime.strptime(due_date_str, '%Y-%m-%d').date()
+        today = date.today()
+        
+        if due == today:
+            return "Hôm nay"
+        elif due == today + timedelta(days=1):
+            return "Ngày mai"
+        elif due < today:
+            days_ago = (today - due).days
+            return f"Quá {days_ago} ngày"
+        else:
+            return due.strftime("%d/%m/%Y")
+    except:
+        return due_date_str
+
+
+def get_due_date_color(due_date_str: str):
+    try:
+        due = datetime.strptime(due_date_str, '%Y-%m-%d').date()
+        today = date.today()
+        
+        if due < today:
+            return Colors.DANGER  # Quá hạn
+        elif due == today:
+            return Colors.WARNING  # Hôm nay
+        else:
+            return Colors.ACCENT  # Sắp tới
+    except:
+        return ("gray50", "gray60")
+
+
+class NoteRow(ctk.CTkFrame):
+    """Một dòng ghi chú, được tái sử dụng cho nhiều note khi cuộn"""
+    
+    def __init__(self, master, note_list: 'VirtualNoteList'):
+        super().__init__(
+            master,
+            height=ROW_HEIGHT - ROW_GAP,
+            fg_color=("gray85", "gray20"),
+            corner_radius=10,
+            border_width=1,
+            border_color=("gray70", "gray30")
+        )
+        self.pack_propagate(False)
+        self.note_list = note_list
+        self.note = None
+        self.index: Optional[int] = None
+        self.item: Optional[int] = None  # id của canvas window chứa dòng này
+        self._state: Optional[dict] = None
+        icons = note_list.icons
+        
+        inner_frame = ctk.CTkFrame(self, fg_color="transparent")
+        inner_frame.pack(fill="both", expand=True, padx=15, pady=12)
+        
+        # Priority bar (left side) - Luôn hiển thị để tránh checkbox bị lệch
+        self.priority_bar = ctk.CTkFrame(
+            inner_frame,
+            width=4,
+            height=40,
+            corner_radius=2
+        )
+        self.priority_bar.pack(side="left", padx=(0, 10))
+        
+        self.check_var = ctk.BooleanVar(value=False)
+        self.checkbox = ctk.CTkCheckBox(
+            inner_frame,
+            text="",
+            variable=self.check_var,
+            width=24,
+            checkbox_width=24,
+            checkbox_height=24,
+            command=self._on_toggle_completed
+        )
+        self.checkbox.pack(side="left", padx=(0, 15))
+        
+        # Star button (importance - based on priority)
+        if icons.star_icon and icons.star_blank_icon:
+            self.star_btn = ctk.CTkButton(
+                inner_frame,
+                text="",
+                image=icons.star_blank_icon,
+                width=40,
+                height=40,
+                fg_color="transparent",
+                hover_color=("gray75", "gray25"),
+                command=self._on_toggle_important
+            )
+        else:
+            self.star_btn = ctk.CTkButton(
+                inner_frame,
+                text=" ",
+                width=40,
+                height=40,
+                font=ctk.CTkFont(size=20),
+                fg_color="transparent",
+                hover_color=("gray75", "gray25"),
+                command=self._on_toggle_important
+            )
+        self.star_btn.pack(side="right")
+        
+        text_frame = ctk.CTkFrame(inner_frame, fg_color="transparent")
+        text_frame.pack(side="left", fill="x", expand=True)
+        
+        self.title_label = ctk.CTkLabel(
+            text_frame,
+            text="",
+            font=note_list.title_font,
+            anchor="w"
+        )
+        self.title_label.pack(anchor="w")
+        
+        # Info row (category, attachments, due date)
+        self.info_frame = ctk.CTkFrame(text_frame, fg_color="transparent")
+        self.category_label = ctk.CTkLabel(
+            self.info_frame,
+            text="",
+            font=note_list.info_font,
+            text_color=("gray50", "gray60")
+        )
+        self.category_label.grid(row=0, column=0, padx=(0, 10))
+        
+        if icons.attachment_icon:
+            self.attach_label = ctk.CTkLabel(
+                self.info_frame,
+                text="",
+                image=icons.attachment_icon,
+                compound="left",
+                font=note_list.info_font,
+                text_color=("gray50", "gray60")
+            )
+        else:
+            self.attach_label = ctk.CTkLabel(
+                self.info_frame,
+                text="",
+                font=note_list.info_font,
+                text_color=("gray50", "gray60")
+            )
+        self.attach_label.grid(row=0, column=1, padx=(0, 10))
+        
+        if icons.calendar_icon:
+            self.due_label = ctk.CTkLabel(
+                self.info_frame,
+                text="",
+                image=icons.calendar_icon,
+                compound="left",
+                font=note_list.info_font
+            )
+        else:
+            self.due_label = ctk.CTkLabel(
+                self.info_frame,
+                text="",
+                font=note_list.info_font
+            )
+        self.due_label.grid(row=0, column=2, padx=(0, 10))
+        
+        # Bind click để xem chi tiết
+        for widget in (self, inner_frame, text_frame, self.title_label, self.info_frame):
+            widget.bind("<Button-1>", self._on_click)
+    
+    def _render_state(self, note) -> dict:
+        """Các giá trị hiển thị của note, dùng để so sánh với lần vẽ trước"""
+        return {
+            'priority': note.priority,
+            'completed': note.is_completed,
+            'title': note.title,
+            'category': note.category,
+            'attachments': len(note.attachments),
+            # Nhãn hạn phụ thuộc ngày hiện tại ("Hôm nay", "Quá 2 ngày"...)
+            'due': (note.due_date, date.today()) if note.due_date else None,
+        }
+    
+    def show(self, note):
+        """Gắn dòng này với một note, chỉ cập nhật những trường đã thay đổi"""
+        self.note = note
+        state = self._render_state(note)
+        old = self._state
+        self._state = state
+        changed = {key for key in state if old is None or old[key] != state[key]}
+        if not changed:
+            return
+        
+        icons = self.note_list.icons
+        
+        if 'priority' in changed:
+            self.priority_bar.configure(fg_color=Colors.get_priority_color(note.priority))
+            is_important = note.priority == Priority.HIGH
+            if icons.star_icon and icons.star_blank_icon:
+                self.star_btn.configure(image=icons.star_icon if is_important else icons.star_blank_icon)
+            else:
+                self.star_btn.configure(text_color=Colors.STAR if is_important else ("gray50", "gray60"))
+        
+        if 'completed' in changed:
+            self.check_var.set(note.is_completed)
+        
+        if changed & {'title', 'completed'}:
+            self.title_label.configure(
+                text=note.title,
+                font=self.note_list.title_font_done if note.is_completed else self.note_list.title_font,
+                text_color=("gray60", "gray60") if note.is_completed else ("gray10", "gray90")
+            )
+        
+        if changed & {'category', 'attachments', 'due'}:
+            has_info = (note.category != FilterType.ALL) or note.attachments or note.due_date
+            if has_info:
+                self.info_frame.pack(anchor="w", pady=(3, 0))
+            else:
+                self.info_frame.pack_forget()
+        
+        if 'category' in changed:
+            if note.category != FilterType.ALL:
+                self.category_label.configure(text=f"{note.category}")
+                self.category_label.grid()
+            else:
+                self.category_label.grid_remove()
+        
+        if 'attachments' in changed:
+            if note.attachments:
+                prefix = " " if icons.attachment_icon else "📎 "
+                self.attach_label.configure(text=f"{prefix}{len(note.attachments)}")
+                self.attach_label.grid()
+            else:
+                self.attach_label.grid_remove()
+        
+        if 'due' in changed:
+            if note.due_date:
+                prefix = " " if icons.calendar_icon else "📅 "
+                self.due_label.configure(
+                    text=f"{prefix}{format_due_date(note.due_date)}",
+                    text_color=get_due_date_color(note.due_date)
+                )
+                self.due_label.grid()
+            else:
+                self.due_label.grid_remove()
+    
+    def _on_click(self, event=None):
+        if self.note is not None and self.note_list.on_note_click:
+            self.note_list.on_note_click(self.note)
+    
+    def _on_toggle_completed(self):
+        if self.note is not None and self.note_list.on_toggle_completed:
+            self.note_list.on_toggle_completed(self.note.note_id)
+    
+    def _on_toggle_important(self):
+        if self.note is not None and self.note_list.on_toggle_important:
+            self.note_list.on_toggle_important(self.note.note_id)
+
+
+class VirtualNoteList(ctk.CTkFrame):
+    """
+    Danh sách cuộn ảo: canvas có chiều cao bằng toàn bộ danh sách nhưng chỉ
+    giữ một nhóm NoteRow đủ phủ vùng nhìn thấy (cộng OVERSCAN). Khi cuộn,
+    các dòng được dời vị trí và gắn lại với note tương ứng thay vì tạo mới.
+    """
+    
+    def __init__(self, master, icons, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        # icons: đối tượng có star_icon, star_blank_icon, attachment_icon, calendar_icon
+        self.icons = icons
+        
+        self.on_note_click: Optional[Callable] = None
+        self.on_toggle_completed: Optional[Callable] = None
+        self.on_toggle_important: Optional[Callable] = None
+        # Gọi khi cuộn gần tới cuối danh sách (để tải trang tiếp theo)
+        self.on_reach_end: Optional[Callable] = None
+        
+        self.notes: List = []
+        self._end_requested = False
+        self._rows: List[NoteRow] = []
+        # note_id -> dòng đang hiển thị note đó (chỉ các dòng đã dựng)
+        self._rows_by_id: Dict = {}
+        
+        # Font dùng chung cho mọi dòng
+        self.title_font = ctk.CTkFont(size=14)
+        self.title_font_done = ctk.CTkFont(size=14, overstrike=True)
+        self.info_font = ctk.CTkFont(size=11)
+        
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        
+        self.canvas = ctk.CTkCanvas(
+            self,
+            highlightthickness=0,
+            borderwidth=0,
+            bg=self._apply_appearance_mode(self.cget("bg_color")),
+            yscrollincrement=ROW_HEIGHT // 3
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        
+        self.empty_label = ctk.CTkLabel(
+            self.canvas,
+            text=Messages.INFO_NO_NOTES,
+            font=ctk.CTkFont(size=16),
+            text_color=("gray50", "gray60")
+        )
+        self._empty_item = self.canvas.create_window(0, 50, anchor="n", window=self.empty_label, state="hidden")
+        
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.bind_all("<MouseWheel>", self._on_mouse_wheel, add=True)
+        self.bind_all("<Button-4>", self._on_mouse_wheel, add=True)
+        self.bind_all("<Button-5>", self._on_mouse_wheel, add=True)
+    
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        self.canvas.configure(bg=self._apply_appearance_mode(self.cget("bg_color")))
+    
+    # ==================== Public API ====================
+    
+    def set_notes(self, notes: list):
+        self.notes = list(notes)
+        self._end_requested = False
+        self._update_scrollregion()
+        
+        if self.notes:
+            self.canvas.itemconfigure(self._empty_item, state="hidden")
+        else:
+            self.canvas.itemconfigure(self._empty_item, state="normal")
+        
+        self._render()
+    
+    def append_notes(self, notes: list):
+        """Nối thêm một trang vào cuối, giữ nguyên vị trí cuộn và các dòng đang hiển thị"""
+        self._end_requested = False
+        if not notes:
+            return
+        self.notes.extend(notes)
+        self.canvas.itemconfigure(self._empty_item, state="hidden")
+        self._update_scrollregion()
+        self._render()
+    
+    def remove_note(self, note_id):
+        """Bỏ một note khỏi danh sách, giữ vị trí cuộn"""
+        self.notes = [note for note in self.notes if note.note_id != note_id]
+        if not self.notes:
+            self.canvas.itemconfigure(self._empty_item, state="normal")
+        self._update_scrollregion()
+        self._render()
+    
+    def scroll_to_top(self):
+        self.canvas.yview_moveto(0)
+    
+    # ==================== Rendering ====================
+    
+    def _update_scrollregion(self):
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(len(self.notes) * ROW_HEIGHT, self.canvas.winfo_height(), 1)
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+    
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), ROW_HEIGHT)
+        first = max(0, int(top // ROW_HEIGHT) - OVERSCAN)
+        last = min(len(self.notes), int((top + height) // ROW_HEIGHT) + 1 + OVERSCAN)
+        return first, last
+    
+    def _ensure_rows(self, count: int):
+        width = self.canvas.winfo_width()
+        while len(self._rows) < count:
+            row = NoteRow(self.canvas, self)
+            row.item = self.canvas.create_window(0, 0, anchor="nw", window=row, width=width, state="hidden")
+            self._rows.append(row)
+    
+    def _place_row(self, row: NoteRow, index: int, note):
+        if row.index != index:
+            self.canvas.coords(row.item, 0, index * ROW_HEIGHT + ROW_GAP // 2)
+            if row.index is None:
+                self.canvas.itemconfigure(row.item, state="normal")
+            row.index = index
+        row.show(note)
+        self._rows_by_id[note.note_id] = row
+    
+    def _render(self):
+        """
+        Diff theo note_id: dòng đang hiển thị một note vẫn còn trong cửa sổ
+        được giữ lại (chỉ dời vị trí và cập nhật trường thay đổi); các dòng
+        còn lại được gắn cho những note mới lọt vào cửa sổ.
+        """
+        first, last = self._visible_range()
+        self._ensure_rows(last - first)
+        
+        wanted = {self.notes[i].note_id: i for i in range(first, last)}
+        previous = self._rows_by_id
+        self._rows_by_id = {}
+        
+        free_rows = []
+        for row in self._rows:
+            note_id = row.note.note_id if row.note is not None else None
+            if note_id in wanted and previous.get(note_id) is row:
+                index = wanted.pop(note_id)
+                self._place_row(row, index, self.notes[index])
+            else:
+                free_rows.append(row)
+        
+        for note_id, index in wanted.items():
+            self._place_row(free_rows.pop(), index, self.notes[index])
+        
+        for row in free_rows:
+            if row.index is not None:
+                self.canvas.itemconfigure(row.item, state="hidden")
+                row.index = None
+            row.note = None
+        
+        # Cửa sổ hiển thị (kể cả OVERSCAN) đã chạm cuối: xin thêm một lần cho tới khi có dữ liệu mới
+        if self.on_reach_end and self.notes and last >= len(self.notes) and not self._end_requested:
+            self._end_requested = True
+            self.after_idle(self.on_reach_end)
+    
+    def refresh_note(self, note):
+        """Cập nhật tại chỗ dòng của một note (nếu đang hiển thị), O(1)"""
+        row = self._rows_by_id.get(note.note_id)
+        if row is not None:
+            row.show(note)
+    
+    # ==================== Events ====================
+    
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._render()
+    
+    def _on_resize(self, event):
+        for row in self._rows:
+            self.canvas.itemconfigure(row.item, width=event.width)
+        self.canvas.coords(self._empty_item, event.width // 2, 50)
+        self._update_scrollregion()
+        self._render()
+    
+    def _is_inside(self, widget) -> bool:
+        return str(widget).startswith(str(self.canvas))
+    
+    def _on_mouse_wheel(self, event):
+        if not self._is_inside(event.widget):
+            return
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        else:
+            step = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(step * 3, "units")